@@ -0,0 +1,277 @@
+"""
+Placement-Search Autoplayer
+Lists every final placement (rotation x column, dropped straight down) of
+the current piece, looks one piece ahead with next_piece, scores boards
+with a heuristic and keeps evaluated board+piece states in an LRU
+transposition cache so repeated positions cost nothing.
+"""
+
+import time
+from collections import OrderedDict
+
+from constants import ACTION_LEFT, ACTION_RIGHT, ACTION_DOWN, ACTION_ROTATE
+from pieces import PIECE_CELLS, build_row_masks
+from tournament import Agent
+
+# Heuristic weights for aggregate height, cleared lines, holes and bumpiness
+HEIGHT_WEIGHT = -0.510066
+LINES_WEIGHT = 0.760666
+HOLES_WEIGHT = -0.35663
+BUMPINESS_WEIGHT = -0.184483
+
+# Time allowed for one decision (seconds). It bounds the look-ahead only:
+# the one pass over the current piece's own placements always runs in full
+DEFAULT_BUDGET = 0.001
+
+# Empty rows kept above the stack when planning: room for a piece landing on
+# it and for the next one spawning above that (rows further up are all empty)
+STACK_MARGIN = 8
+
+# Rotations with a distinct cell layout (O has one, I/S/Z have two)
+DISTINCT_ROTATIONS = {
+    shape_type: tuple(r for r in range(4) if rotations[r] not in rotations[:r])
+    for shape_type, rotations in PIECE_CELLS.items()
+}
+
+
+def stack_frame(rows, top=0):
+    """Get the rows from STACK_MARGIN above the stack down, as a tuple
+    
+    top is where to start looking for the stack (board.stack_top when known).
+    Boards with the same stack get the same frame, whatever their height.
+    """
+    height = len(rows)
+    while top < height and not rows[top]:
+        top += 1
+    margin = min(top, STACK_MARGIN)
+    return (0,) * margin + tuple(rows[top:])
+
+
+def fits(rows, row_masks, y):
+    """Check whether precomputed row masks fit on rows with their origin at row y"""
+    if row_masks is None:
+        return False
+    height = len(rows)
+    for dy, mask in row_masks:
+        row = y + dy
+        if row >= height or (row >= 0 and rows[row] & mask):
+            return False
+    return True
+
+
+class PlacementPlanner:
+    """Chooses where to put a piece by searching straight-drop placements"""
+    
+    def __init__(self, width, budget=DEFAULT_BUDGET, cache_size=8192):
+        self.width = width
+        self.full_row = (1 << width) - 1
+        self.height = 0  # Rows on the board being planned for (set by choose)
+        self.row_masks = build_row_masks(width)
+        self.budget = budget
+        self.cache_size = cache_size
+        self.cache = OrderedDict()  # (rows, shape_type) -> scored placements
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self.lookahead_costs = {}  # next shape_type -> seconds the last uncached look-ahead took
+    
+    def placements(self, rows, shape_type, start_x, start_y):
+        """Yield (rotation, x, y) for every final position reachable from (start_x, start_y)
+        
+        A placement counts as reachable when the piece can take that rotation
+        at the start position and slide sideways to its column at start_y.
+        rows is a stack frame and positions are relative to it.
+        """
+        by_rotation = self.row_masks[shape_type]
+        
+        # Rows above the stack are empty, so the drop can start just above it
+        top = 0
+        while top < len(rows) and not rows[top]:
+            top += 1
+        drop_from = max(start_y, top - 4)
+        
+        for rotation in DISTINCT_ROTATIONS[shape_type]:
+            by_column = by_rotation[rotation]
+            if not fits(rows, by_column.get(start_x), start_y):
+                continue
+            for step in (-1, 1):
+                x = start_x if step == -1 else start_x + 1
+                while fits(rows, by_column.get(x), start_y):
+                    masks = by_column[x]
+                    y = drop_from
+                    while fits(rows, masks, y + 1):
+                        y += 1
+                    yield rotation, x, y
+                    x += step
+    
+    def place(self, rows, shape_type, rotation, x, y):
+        """Get the stack frame after locking a piece, and the number of lines it clears"""
+        rows = list(rows)
+        full = self.full_row
+        cleared = 0
+        for dy, mask in self.row_masks[shape_type][rotation][x]:
+            rows[y + dy] |= mask
+            if rows[y + dy] == full:
+                cleared += 1
+        if cleared:
+            rows = [row for row in rows if row != full]
+        
+        # Frame the new stack the same way a board holding it would be framed
+        top = 0
+        while top < len(rows) and not rows[top]:
+            top += 1
+        margin = min(STACK_MARGIN, self.height - len(rows) + top)
+        return (0,) * margin + tuple(rows[top:]), cleared
+    
+    def evaluate(self, rows, cleared):
+        """Score a board: higher is better"""
+        height = len(rows)
+        heights = [0] * self.width
+        aggregate = 0
+        holes = 0
+        seen = 0
+        for y, row in enumerate(rows):
+            if not (row | seen):
+                continue
+            # Columns whose top block is on this row
+            new = row & ~seen
+            while new:
+                bit = new & -new
+                heights[bit.bit_length() - 1] = height - y
+                aggregate += height - y
+                new ^= bit
+            # Empty cells with a block somewhere above them
+            holes += (seen & ~row).bit_count()
+            seen |= row
+        
+        bumpiness = 0
+        for x in range(self.width - 1):
+            bumpiness += abs(heights[x] - heights[x + 1])
+        
+        return (HEIGHT_WEIGHT * aggregate + LINES_WEIGHT * cleared
+                + HOLES_WEIGHT * holes + BUMPINESS_WEIGHT * bumpiness)
+    
+    def score_placements(self, rows, shape_type, start_x, start_y):
+        """Get (value, placement, cleared) for every placement, best first"""
+        candidates = []
+        for placement in self.placements(rows, shape_type, start_x, start_y):
+            after, cleared = self.place(rows, shape_type, *placement)
+            candidates.append((self.evaluate(after, cleared), placement, cleared))
+        candidates.sort(reverse=True)
+        return candidates
+    
+    def expand(self, rows, shape_type):
+        """Get the scored placements of a freshly spawned piece on rows (cached)"""
+        key = (rows, shape_type)
+        candidates = self.cache.get(key)
+        if candidates is not None:
+            self.cache.move_to_end(key)
+            self.cache_hits += 1
+            return candidates
+        
+        self.cache_misses += 1
+        candidates = self.score_placements(rows, shape_type, self.width // 2 - 1, 0)
+        self.cache[key] = candidates
+        if len(self.cache) > self.cache_size:
+            self.cache.popitem(last=False)
+        return candidates
+    
+    def choose(self, rows, piece, next_shape=None, top=0):
+        """Pick (rotation, x, y) for piece on rows, or None if nothing fits
+        
+        Only the stack and STACK_MARGIN rows above it are searched; pass the
+        board's stack_top as top so the empty rows above are not even read.
+        Placements are visited best-first by their own score and re-scored
+        with the best follow-up for next_shape until the time budget runs out.
+        The budget bounds the look-ahead only; scoring the piece's own
+        placements always completes, and when that alone uses up the budget
+        the best of them is taken as is. The follow-up boards are cached, so
+        when the next piece spawns its own placements are usually already
+        scored.
+        """
+        start = time.perf_counter()
+        deadline = start + self.budget
+        self.height = len(rows)
+        rows = stack_frame(rows, top)
+        base = self.height - len(rows)  # Board row of the frame's first row
+        shape_type = piece.shape_type
+        
+        # A piece spawning above the frame moves through empty rows only, so
+        # the frame's first row stands in for the spawn row
+        if piece.rotation == 0 and (piece.x, piece.y) == (self.width // 2 - 1, 0):
+            candidates = self.expand(rows, shape_type)
+        else:
+            candidates = self.score_placements(rows, shape_type, piece.x, piece.y - base)
+        if not candidates:
+            return None
+        if next_shape is None:
+            rotation, x, y = candidates[0][1]
+            return rotation, x, y + base
+        
+        best_value = float("-inf")
+        best_placement = candidates[0][1]
+        # Budget every look-ahead as a cache miss; until next_shape has
+        # missed once, expect one to cost what scoring this piece did
+        cost = self.lookahead_costs.get(next_shape, time.perf_counter() - start)
+        for _, placement, cleared in candidates:
+            # Stop before a look-ahead that could overrun the budget
+            now = time.perf_counter()
+            if now + cost >= deadline:
+                break
+            misses = self.cache_misses
+            after, _ = self.place(rows, shape_type, *placement)
+            follow_ups = self.expand(after, next_shape)
+            value = LINES_WEIGHT * cleared + (follow_ups[0][0] if follow_ups else float("-inf"))
+            if value > best_value:
+                best_value = value
+                best_placement = placement
+            if self.cache_misses != misses:
+                cost = self.lookahead_costs[next_shape] = time.perf_counter() - now
+        rotation, x, y = best_placement
+        return rotation, x, y + base
+
+
+class PlacementAgent(Agent):
+    """Plays by planning each piece's placement and steering it there"""
+    
+    # Give up steering and just drop after this many ticks on one piece
+    MAX_STEERING_TICKS = 60
+    
+    def __init__(self, budget=DEFAULT_BUDGET):
+        self.budget = budget
+        self.planner = None
+    
+    def reset(self, engine):
+        if self.planner is None or self.planner.width != engine.board.width:
+            self.planner = PlacementPlanner(engine.board.width, self.budget)
+        self.pieces_placed = None
+        self.target = None
+        self.ticks = 0
+    
+    def act(self, engine):
+        if self.planner is None:
+            self.reset(engine)
+        
+        # Plan once per piece
+        if engine.pieces_placed != self.pieces_placed:
+            self.pieces_placed = engine.pieces_placed
+            next_shape = engine.next_piece.shape_type if engine.next_piece else None
+            board = engine.board
+            self.target = self.planner.choose(board.rows, engine.current_piece, next_shape, board.stack_top)
+            self.ticks = 0
+        self.ticks += 1
+        
+        piece = engine.current_piece
+        if self.target is None or self.ticks > self.MAX_STEERING_TICKS:
+            return ACTION_DOWN
+        
+        rotation, x, _ = self.target
+        actions = 0
+        if piece.rotation != rotation:
+            actions |= ACTION_ROTATE
+        if piece.x < x:
+            actions |= ACTION_RIGHT
+        elif piece.x > x:
+            actions |= ACTION_LEFT
+        if not actions:
+            actions = ACTION_DOWN
+        return actions
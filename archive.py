@@ -0,0 +1,335 @@
+"""
+Game Log Archive
+Append-only binary archive of finished games: a data file of packed records
+(seed, every piece placement, every line clear) and a fixed-width index of
+per-game results that is read through mmap, so millions of games can be
+filtered and aggregated without reading a single record.
+
+Usage:
+    python tournament.py --agent placement --seeds 0:10000 --archive games.tga
+    python archive.py games.tga --min-score 5000 --list
+    python archive.py games.tga --show 42
+"""
+
+import argparse
+import mmap
+import os
+import struct
+import sys
+import time
+from collections import namedtuple
+
+from randomizer import GENERATORS, PIECE_TYPES
+from replay import parse_tick_range
+
+ARCHIVE_VERSION = 1
+
+# File headers: magic, version, size of one index entry
+DATA_MAGIC = b"TGAD"
+INDEX_MAGIC = b"TGAI"
+HEADER = struct.Struct("<4sHH8x")
+
+# One index entry per game (64 bytes, every field aligned to its own size).
+# ticks counts only the ticks the game was in play (engine.play_ticks), so
+# games that were paused or left on the game over screen compare fairly
+# with headless ones; placement ticks in records are engine ticks, as replays
+# need them
+INDEX_ENTRY = struct.Struct("<QqQdIIIIIHHBB6x")
+IndexEntry = namedtuple("IndexEntry", (
+    "offset", "seed", "score", "finished", "length", "level", "lines", "pieces", "ticks",
+    "width", "height", "randomizer", "flags"
+))
+
+# Field name -> (byte offset in an entry, struct format character)
+INDEX_CODES = "QqQdIIIIIHHBB"
+INDEX_FIELDS = {
+    name: (struct.calcsize("<" + INDEX_CODES[:i]), code)
+    for i, (name, code) in enumerate(zip(IndexEntry._fields, INDEX_CODES))
+}
+
+# IndexEntry.flags bits
+FLAG_GAME_OVER = 1  # The game ended by topping out, not by quitting or a tick limit
+
+# Record: placement and line clear counts, then the placements, then the clears
+RECORD_HEADER = struct.Struct("<II")
+# shape index in PIECE_TYPES, rotation, x, y, tick the piece locked on
+PLACEMENT = struct.Struct("<BBhhI")
+# index of the placement that cleared, topmost cleared row, cleared rows as
+# bits from that row down (a piece spans at most 4 rows)
+LINE_CLEAR = struct.Struct("<IHB")
+
+Placement = namedtuple("Placement", ("shape_type", "rotation", "x", "y", "tick"))
+LineClear = namedtuple("LineClear", ("piece", "rows"))
+GameRecord = namedtuple("GameRecord", ("entry", "placements", "clears"))
+
+# A finished game ready to append: the index entry without offset and
+# length, and the record bytes (picklable, so worker processes can pack games)
+PackedGame = namedtuple("PackedGame", ("summary", "record"))
+
+SHAPE_INDEX = {shape_type: i for i, shape_type in enumerate(PIECE_TYPES)}
+RANDOMIZERS = tuple(GENERATORS)
+
+
+class GameLog:
+    """Placements and line clears of the game an engine is playing
+    
+    Attach one as engine.log; the engine reports every locked piece and line
+    clear to it, rewinds it on restore() and empties it on reset().
+    """
+    
+    def __init__(self):
+        self.placements = bytearray()
+        self.clears = bytearray()
+    
+    def __len__(self):
+        return len(self.placements) // PLACEMENT.size
+    
+    def placed(self, piece, tick):
+        """Log a piece locking where it is"""
+        self.placements += PLACEMENT.pack(SHAPE_INDEX[piece.shape_type], piece.rotation, piece.x, piece.y, tick)
+    
+    def cleared(self, piece, lines):
+        """Log the full rows lines cleared by placement number piece"""
+        top = min(lines)
+        mask = 0
+        for y in lines:
+            mask |= 1 << (y - top)
+        self.clears += LINE_CLEAR.pack(piece, top, mask)
+    
+    def rewind(self, pieces):
+        """Forget everything after the first pieces placements (undo)"""
+        del self.placements[pieces * PLACEMENT.size:]
+        clears = self.clears
+        while clears and LINE_CLEAR.unpack_from(clears, len(clears) - LINE_CLEAR.size)[0] >= pieces:
+            del clears[-LINE_CLEAR.size:]
+    
+    def clear(self):
+        """Start logging a new game"""
+        self.placements.clear()
+        self.clears.clear()
+    
+    def pack(self):
+        """Get the log as one archive record"""
+        return b"".join((
+            RECORD_HEADER.pack(len(self), len(self.clears) // LINE_CLEAR.size),
+            self.placements,
+            self.clears
+        ))
+
+
+def pack_game(engine, log):
+    """Pack the game engine is playing (logged by log) for GameArchive.append"""
+    board = engine.board
+    summary = (
+        engine.seed, engine.score, time.time(), engine.level, engine.lines_cleared, engine.pieces_placed,
+        engine.play_ticks, board.width, board.height, RANDOMIZERS.index(engine.randomizer),
+        FLAG_GAME_OVER if engine.game_over else 0
+    )
+    return PackedGame(summary, log.pack())
+
+
+def unpack_record(entry, data):
+    """Decode a record's bytes into a GameRecord"""
+    placement_count, clear_count = RECORD_HEADER.unpack_from(data)
+    start = RECORD_HEADER.size
+    end = start + placement_count * PLACEMENT.size
+    placements = [Placement(PIECE_TYPES[shape], rotation, x, y, tick)
+                  for shape, rotation, x, y, tick in PLACEMENT.iter_unpack(data[start:end])]
+    clears = [LineClear(piece, tuple(top + i for i in range(8) if mask >> i & 1))
+              for piece, top, mask in LINE_CLEAR.iter_unpack(data[end:end + clear_count * LINE_CLEAR.size])]
+    return GameRecord(entry, placements, clears)
+
+
+class GameArchive:
+    """An archive at path (records) and path + '.idx' (index)
+    
+    mode "a" opens it for appending, creating it if missing; mode "r" opens
+    an existing archive read-only and never writes to it. Appends go to the
+    end of both files, the index entry last, so a crash can at worst leave an
+    unreferenced record behind. Only one process may append at a time; any
+    number can read, even while it appends (a partly written index entry is
+    not counted until it is complete).
+    """
+    
+    def __init__(self, path, mode="a"):
+        if mode not in ("a", "r"):
+            raise ValueError(f"mode must be 'a' or 'r', got {mode!r}")
+        self.path = path
+        self.index_path = path + ".idx"
+        self.writable = mode == "a"
+        self.data = self.open_file(path, DATA_MAGIC)
+        try:
+            self.index_file = self.open_file(self.index_path, INDEX_MAGIC)
+        except (OSError, ValueError):
+            self.data.close()
+            raise
+        self.map = None
+        
+        # Drop a partly written entry left by a crash, so appends stay aligned
+        entries_end = HEADER.size + len(self) * INDEX_ENTRY.size
+        if self.writable and os.fstat(self.index_file.fileno()).st_size > entries_end:
+            self.index_file.truncate(entries_end)
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, *exc_info):
+        self.close()
+    
+    def open_file(self, path, magic):
+        """Open one of the archive's files, checking its header (written first when appending to a new file)"""
+        f = open(path, "a+b" if self.writable else "rb")
+        f.seek(0)
+        header = f.read(HEADER.size)
+        if not header and self.writable:
+            f.write(HEADER.pack(magic, ARCHIVE_VERSION, INDEX_ENTRY.size))
+            f.flush()
+        elif len(header) < HEADER.size or HEADER.unpack(header) != (magic, ARCHIVE_VERSION, INDEX_ENTRY.size):
+            f.close()
+            raise ValueError(f"{path}: not a version {ARCHIVE_VERSION} game archive")
+        return f
+    
+    def __len__(self):
+        return (os.fstat(self.index_file.fileno()).st_size - HEADER.size) // INDEX_ENTRY.size
+    
+    def append(self, packed):
+        """Append a PackedGame and return its game number"""
+        if not self.writable:
+            raise ValueError(f"{self.path}: archive was opened read-only")
+        data = self.data
+        offset = data.seek(0, os.SEEK_END)
+        data.write(packed.record)
+        data.flush()
+        number = len(self)
+        self.index_file.write(INDEX_ENTRY.pack(offset, *packed.summary[:3], len(packed.record), *packed.summary[3:]))
+        self.index_file.flush()
+        return number
+    
+    def index(self):
+        """Get the index entries as one read-only memoryview of the mmapped index file
+        
+        Entry i is bytes [i * INDEX_ENTRY.size, (i + 1) * INDEX_ENTRY.size);
+        the file is mapped again when games were appended since the last call.
+        """
+        size = HEADER.size + len(self) * INDEX_ENTRY.size
+        if self.map is None or len(self.map) < size:
+            self.map = mmap.mmap(self.index_file.fileno(), size, access=mmap.ACCESS_READ)
+        return memoryview(self.map)[HEADER.size:size]
+    
+    def entries(self, start=0, stop=None):
+        """Yield the IndexEntry of games start to stop"""
+        index = self.index()
+        stop = len(index) // INDEX_ENTRY.size if stop is None else stop
+        for fields in INDEX_ENTRY.iter_unpack(index[start * INDEX_ENTRY.size:stop * INDEX_ENTRY.size]):
+            yield IndexEntry._make(fields)
+    
+    def column(self, name):
+        """Get one index field of every game, zero-copy where the host is little-endian"""
+        offset, code = INDEX_FIELDS[name]
+        index = self.index()
+        if sys.byteorder != "little":
+            return [getattr(entry, name) for entry in self.entries()]
+        # Entries are a whole number of this field's items, so the field is
+        # every (entry size / item size)-th item from its own offset
+        step = INDEX_ENTRY.size // struct.calcsize(code)
+        count = len(index) // INDEX_ENTRY.size
+        if not count:
+            return ()
+        return index[offset:offset + count * INDEX_ENTRY.size].cast(code)[::step]
+    
+    def read(self, number):
+        """Read and decode game number's record"""
+        entry = next(self.entries(number, number + 1), None) if number >= 0 else None
+        if entry is None:
+            raise IndexError(f"game {number} is not in {self.path}")
+        self.data.seek(entry.offset)
+        return unpack_record(entry, self.data.read(entry.length))
+    
+    def close(self):
+        """Close the files (memoryviews handed out keep their mapping alive)"""
+        self.map = None
+        self.data.close()
+        self.index_file.close()
+
+
+def index_dtype():
+    """Get a NumPy dtype matching one index entry, for np.frombuffer(archive.index(), index_dtype())"""
+    import numpy as np
+    return np.dtype({
+        "names": list(INDEX_FIELDS),
+        "formats": ["<" + code for _, code in INDEX_FIELDS.values()],
+        "offsets": [offset for offset, _ in INDEX_FIELDS.values()],
+        "itemsize": INDEX_ENTRY.size
+    })
+
+
+def select(archive, min_score=0, seeds=None, game_over_only=False):
+    """Get the numbers of the games passing the filters, scanning only the index
+    
+    Queries only read, so open the archive with GameArchive(path, "r").
+    """
+    numbers = range(len(archive))
+    if min_score:
+        scores = archive.column("score")
+        numbers = [i for i in numbers if scores[i] >= min_score]
+    if seeds is not None:
+        seed_column = archive.column("seed")
+        numbers = [i for i in numbers if seed_column[i] in seeds]
+    if game_over_only:
+        flags = archive.column("flags")
+        numbers = [i for i in numbers if flags[i] & FLAG_GAME_OVER]
+    return numbers
+
+
+def main():
+    """Filter and summarize an archive's games, or print one game's record"""
+    parser = argparse.ArgumentParser(description="Query a Tetris game log archive")
+    parser.add_argument("archive", help="archive file written with --archive")
+    parser.add_argument("--min-score", type=int, default=0, help="only games that scored at least this")
+    parser.add_argument("--seeds", metavar="START:END", type=parse_tick_range, help="only games with these seeds")
+    parser.add_argument("--game-over", action="store_true", help="only games that ended by topping out")
+    parser.add_argument("--list", action="store_true", help="print the index entry of every matching game")
+    parser.add_argument("--show", type=int, metavar="N", help="print game N's placements and line clears")
+    args = parser.parse_args()
+    
+    try:
+        archive = GameArchive(args.archive, "r")
+    except FileNotFoundError as error:
+        sys.exit(f"archive: {error.filename} does not exist")
+    except (OSError, ValueError) as error:
+        sys.exit(f"archive: {error}")
+    
+    with archive:
+        if args.show is not None:
+            try:
+                record = archive.read(args.show)
+            except IndexError as error:
+                sys.exit(f"archive: {error}")
+            print(record.entry)
+            clears = {clear.piece: clear.rows for clear in record.clears}
+            for number, placement in enumerate(record.placements):
+                rows = clears.get(number)
+                print(f"{number:6} tick {placement.tick:7} {placement.shape_type} rotation {placement.rotation} "
+                      f"at ({placement.x}, {placement.y})" + (f"  cleared rows {rows}" if rows else ""))
+            return
+        
+        start = time.perf_counter()
+        numbers = select(archive, args.min_score, args.seeds, args.game_over)
+        if args.list:
+            for number in numbers:
+                print(number, next(archive.entries(number, number + 1)))
+        
+        scores = archive.column("score")
+        lines = archive.column("lines")
+        pieces = archive.column("pieces")
+        selected = [scores[i] for i in numbers]
+        elapsed = time.perf_counter() - start
+        print(f"{len(numbers)} of {len(scores)} games match", file=sys.stderr)
+        if selected:
+            print(f"score mean {sum(selected) / len(selected):.1f} max {max(selected)}, "
+                  f"lines {sum(lines[i] for i in numbers)}, pieces {sum(pieces[i] for i in numbers)} "
+                  f"({elapsed * 1000:.1f} ms)", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
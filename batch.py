@@ -0,0 +1,205 @@
+"""
+Batched NumPy Engine
+Steps N independent games at once with vectorized array operations, using
+the same shapes, kicks, scoring and leveling rules as TetrisEngine.
+Requires NumPy (pip install numpy); the rest of the game does not.
+"""
+
+import numpy as np
+
+from board import COLOR_INDEX
+from constants import (
+    GRID_WIDTH, GRID_HEIGHT, FALL_SPEED, SCORE_PER_LINE, SCORE_MULTIPLIER,
+    TICK_DT, ACTION_LEFT, ACTION_RIGHT, ACTION_DOWN, ACTION_ROTATE
+)
+from pieces import PIECE_CELLS, WALL_KICKS
+from randomizer import PIECE_TYPES
+
+# Cell offsets indexed by [piece type, rotation, cell] -> (dx, dy)
+CELL_OFFSETS = np.array(
+    [[PIECE_CELLS[shape_type][rotation] for rotation in range(4)] for shape_type in PIECE_TYPES],
+    dtype=np.int64
+)
+
+# Palette index for each piece type
+TYPE_COLORS = np.array([COLOR_INDEX[shape_type] for shape_type in PIECE_TYPES], dtype=np.uint8)
+
+# Score multiplier by number of lines cleared at once (a piece spans at most 4 rows)
+LINE_MULTIPLIERS = np.array([0] + [SCORE_MULTIPLIER.get(n, n * 2) for n in range(1, 5)], dtype=np.int64)
+
+
+class BatchEngine:
+    """N Tetris games stored as arrays and stepped together
+    
+    boards has shape (N, height, width) and holds palette indices (0 = empty).
+    The falling piece of game i is piece[i] (index into PIECE_TYPES) at
+    rotation[i], x[i], y[i]. Pausing is not modeled; finished games stay
+    frozen until reset.
+    """
+    
+    def __init__(self, num_games, width=GRID_WIDTH, height=GRID_HEIGHT, seed=None):
+        self.num_games = num_games
+        self.width = width
+        self.height = height
+        self.rng = np.random.default_rng(seed)
+        
+        self.boards = np.zeros((num_games, height, width), dtype=np.uint8)
+        self.piece = np.zeros(num_games, dtype=np.int64)
+        self.next_piece = np.zeros(num_games, dtype=np.int64)
+        self.rotation = np.zeros(num_games, dtype=np.int64)
+        self.x = np.zeros(num_games, dtype=np.int64)
+        self.y = np.zeros(num_games, dtype=np.int64)
+        self.fall_timer = np.zeros(num_games, dtype=np.float64)
+        self.fall_speed = np.full(num_games, FALL_SPEED, dtype=np.float64)
+        self.score = np.zeros(num_games, dtype=np.int64)
+        self.level = np.ones(num_games, dtype=np.int64)
+        self.lines_cleared = np.zeros(num_games, dtype=np.int64)
+        self.pieces_placed = np.zeros(num_games, dtype=np.int64)
+        self.game_over = np.zeros(num_games, dtype=bool)
+        
+        self.reset()
+    
+    def random_pieces(self, games):
+        """Draw a uniformly random piece type for each game index in games"""
+        return self.rng.integers(0, len(PIECE_TYPES), size=len(games))
+    
+    def reset(self, games=None):
+        """Reset all games, or only those selected by an index array or bool mask"""
+        if games is None:
+            games = np.ones(self.num_games, dtype=bool)
+        else:
+            games = np.asarray(games)
+            if games.dtype != bool:
+                mask = np.zeros(self.num_games, dtype=bool)
+                mask[games] = True
+                games = mask
+        
+        self.boards[games] = 0
+        self.fall_timer[games] = 0
+        self.fall_speed[games] = FALL_SPEED
+        self.score[games] = 0
+        self.level[games] = 1
+        self.lines_cleared[games] = 0
+        self.pieces_placed[games] = 0
+        self.game_over[games] = False
+        
+        index = np.nonzero(games)[0]
+        self.next_piece[index] = self.random_pieces(index)
+        self._spawn(index)
+        self.next_piece[index] = self.random_pieces(index)
+    
+    def collides(self, games, piece, rotation, x, y):
+        """Check piece placements for the game indices in games
+        
+        piece, rotation, x and y hold one entry per selected game.
+        """
+        cells = CELL_OFFSETS[piece, rotation]  # (len(games), 4, 2)
+        cell_x = x[:, None] + cells[:, :, 0]
+        cell_y = y[:, None] + cells[:, :, 1]
+        
+        outside = (cell_x < 0) | (cell_x >= self.width) | (cell_y >= self.height)
+        
+        # Gather with clipped indices; outside and above-top cells are masked off
+        filled = self.boards[
+            games[:, None],
+            np.clip(cell_y, 0, self.height - 1),
+            np.clip(cell_x, 0, self.width - 1)
+        ] != 0
+        filled &= ~outside & (cell_y >= 0)
+        
+        return (outside | filled).any(axis=1)
+    
+    def _move(self, games, dx, dy):
+        """Move the selected games' pieces where the destination is free"""
+        index = np.nonzero(games)[0]
+        new_x = self.x[index] + dx
+        new_y = self.y[index] + dy
+        free = ~self.collides(index, self.piece[index], self.rotation[index], new_x, new_y)
+        moved = index[free]
+        self.x[moved] = new_x[free]
+        self.y[moved] = new_y[free]
+        return moved
+    
+    def _rotate(self, games):
+        """Rotate the selected games' pieces, trying the same wall kicks as TetrisEngine"""
+        pending = np.nonzero(games)[0]
+        for dx in WALL_KICKS:
+            if not len(pending):
+                break
+            next_rotation = (self.rotation[pending] + 1) % 4
+            new_x = self.x[pending] + dx
+            free = ~self.collides(pending, self.piece[pending], next_rotation, new_x, self.y[pending])
+            rotated = pending[free]
+            self.x[rotated] = new_x[free]
+            self.rotation[rotated] = next_rotation[free]
+            pending = pending[~free]
+    
+    def _spawn(self, index):
+        """Make next_piece the falling piece for the given game indices"""
+        self.piece[index] = self.next_piece[index]
+        self.rotation[index] = 0
+        self.x[index] = self.width // 2 - 1
+        self.y[index] = 0
+        blocked = self.collides(index, self.piece[index], self.rotation[index], self.x[index], self.y[index])
+        self.game_over[index[blocked]] = True
+    
+    def _lock(self, index):
+        """Write the given games' pieces into their boards, clear lines and spawn"""
+        if not len(index):
+            return
+        
+        # Place the piece cells (cells above the top are dropped)
+        cells = CELL_OFFSETS[self.piece[index], self.rotation[index]]
+        cell_x = self.x[index, None] + cells[:, :, 0]
+        cell_y = self.y[index, None] + cells[:, :, 1]
+        colors = np.broadcast_to(TYPE_COLORS[self.piece[index]][:, None], cell_x.shape)
+        on_board = cell_y >= 0
+        owners = np.broadcast_to(index[:, None], cell_x.shape)
+        self.boards[owners[on_board], cell_y[on_board], cell_x[on_board]] = colors[on_board]
+        self.pieces_placed[index] += 1
+        
+        # Clear full rows: a stable sort moves them to the top, then they are emptied
+        boards = self.boards[index]
+        full = (boards != 0).all(axis=2)
+        cleared = full.sum(axis=1)
+        if cleared.any():
+            order = np.argsort(~full, axis=1, kind="stable")
+            boards = np.take_along_axis(boards, order[:, :, None], axis=1)
+            boards[np.arange(self.height)[None, :] < cleared[:, None]] = 0
+            self.boards[index] = boards
+            
+            # Scoring and leveling, same rules as TetrisEngine.clear_lines
+            self.lines_cleared[index] += cleared
+            self.score[index] += SCORE_PER_LINE * LINE_MULTIPLIERS[cleared] * self.level[index]
+            self.level[index] = self.lines_cleared[index] // 10 + 1
+            self.fall_speed[index] = np.maximum(0.05, FALL_SPEED - (self.level[index] - 1) * 0.05)
+        
+        self._spawn(index)
+        self.next_piece[index] = self.random_pieces(index)
+    
+    def step(self, actions):
+        """Advance every running game one fixed tick
+        
+        actions is an int array of ACTION_* masks, one per game. Returns the
+        score gained this tick and a mask of games that ended this tick.
+        """
+        actions = np.asarray(actions)
+        running = ~self.game_over
+        score_before = self.score.copy()
+        
+        # Input, in the same order as TetrisEngine.apply_actions
+        self._move(running & (actions & ACTION_LEFT != 0), -1, 0)
+        self._move(running & (actions & ACTION_RIGHT != 0), 1, 0)
+        dropped = self._move(running & (actions & ACTION_DOWN != 0), 0, 1)
+        self.fall_timer[dropped] = 0
+        self._rotate(running & (actions & ACTION_ROTATE != 0))
+        
+        # Gravity
+        self.fall_timer[running] += TICK_DT
+        falling = running & (self.fall_timer >= self.fall_speed)
+        self.fall_timer[falling] = 0
+        landed = falling.copy()
+        landed[self._move(falling, 0, 1)] = False
+        self._lock(np.nonzero(landed)[0])
+        
+        return self.score - score_before, self.game_over & running
@@ -0,0 +1,268 @@
+"""
+Benchmark Suite
+Times the engine's hot paths (collision checks, rotation, locking, line
+clears) and a full rendered frame one at a time, and writes the results as
+JSON so runs can be compared against each other.
+
+Usage:
+    python benchmark.py --output before.json
+    python benchmark.py --compare before.json --max-slowdown 10
+"""
+
+import argparse
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import time
+from functools import partial
+
+from constants import GRID_HEIGHT
+from engine import TetrisEngine, Tetromino
+
+BENCHMARK_VERSION = 1
+
+# Calls per timed run for each benchmark (scaled by --scale)
+DEFAULT_CALLS = 20000
+DEFAULT_REPEATS = 7
+
+# Bottom row of the board, where the line-clear benchmarks put full rows
+BOTTOM = GRID_HEIGHT - 1
+
+
+def make_board(engine, rows, seed=0):
+    """Fill the bottom rows of engine's board, leaving one random gap per row"""
+    rng = random.Random(seed)
+    board = engine.board
+    for y in range(board.height - rows, board.height):
+        gap = rng.randrange(board.width)
+        cells = [(x, y) for x in range(board.width) if x != gap]
+        board.place(cells, rng.randrange(1, 8))
+    return engine
+
+
+def fill_rows(engine, rows):
+    """Completely fill the given rows of engine's board"""
+    board = engine.board
+    for y in rows:
+        board.place([(x, y) for x in range(board.width)], 1)
+    return engine
+
+
+def midgame_engine():
+    """An engine with an 8-row stack and a T piece falling above it"""
+    engine = make_board(TetrisEngine(seed=0), 8)
+    engine.current_piece = Tetromino("T", 4, 6)
+    return engine
+
+
+def resting_engine():
+    """A mid-game engine whose falling piece sits on the stack, ready to lock"""
+    engine = midgame_engine()
+    while engine.move_piece(0, 1):
+        pass
+    return engine
+
+
+def clearing_engine(full_rows):
+    """A nearly full board (one gap per row) with full_rows completely filled"""
+    engine = make_board(TetrisEngine(seed=0), GRID_HEIGHT - 2)
+    return fill_rows(engine, full_rows)
+
+
+def copies(template, count):
+    """Independent copies of an engine, one per timed call that mutates it"""
+    snapshot = template.snapshot()
+    engines = [TetrisEngine(template.seed) for _ in range(count)]
+    for engine in engines:
+        engine.restore(snapshot)
+    return engines
+
+
+def engine_calls(build, method, count, *args):
+    """One call of method (with args) per fresh copy of the engine built by build"""
+    return [partial(getattr(engine, method), *args) for engine in copies(build(), count)]
+
+
+def rotate_calls(count):
+    """Rotations of a free-standing piece (every call succeeds, 4 make a full turn)"""
+    engine = midgame_engine()
+    return [engine.rotate_piece] * count
+
+
+def collision_calls(count, rotation=False):
+    """Collision checks of a piece against a mid-game stack"""
+    engine = midgame_engine()
+    piece = engine.current_piece
+    if rotation:
+        return [partial(engine.check_rotation_collision, piece, 1)] * count
+    return [partial(engine.check_collision, piece, 0, 1)] * count
+
+
+def snapshot_calls(count, restore=False):
+    """Snapshots of a mid-game engine, or restores of one snapshot"""
+    engine = midgame_engine()
+    if restore:
+        return [partial(engine.restore, engine.snapshot())] * count
+    return [engine.snapshot] * count
+
+
+def draw_calls(count):
+    """Full rendered frames of a mid-game position under SDL's dummy video driver"""
+    # Must be set before Pygame creates its window
+    os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+    from tetris import TetrisGame
+    game = TetrisGame(engine=midgame_engine())
+    game.open_display()
+    return [game.draw] * count
+
+
+def startup_calls(count, full_init=False):
+    """Cold starts of the game to its first frame, each in a fresh interpreter"""
+    command = [sys.executable, os.path.join(os.path.dirname(os.path.abspath(__file__)), "tetris.py"),
+               "--measure-startup"]
+    if full_init:
+        command.append("--full-init")
+    env = dict(os.environ, SDL_VIDEODRIVER=os.environ.get("SDL_VIDEODRIVER", "dummy"))
+    run = partial(subprocess.run, command, env=env, check=True,
+                  stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    return [run] * count
+
+
+# name -> (build(count) returning the calls to time, relative call count)
+BENCHMARKS = {
+    "check_collision": (collision_calls, 1),
+    "check_rotation_collision": (partial(collision_calls, rotation=True), 1),
+    "rotate_piece": (rotate_calls, 1),
+    "lock_piece": (partial(engine_calls, resting_engine, "lock_piece"), 0.1),
+    "clear_lines/no_full_rows": (partial(engine_calls, partial(clearing_engine, ()), "clear_lines"), 0.1),
+    "clear_lines/single": (partial(engine_calls, partial(clearing_engine, (BOTTOM,)), "clear_lines"), 0.1),
+    "clear_lines/tetris": (
+        partial(engine_calls, partial(clearing_engine, range(BOTTOM - 3, BOTTOM + 1)), "clear_lines"), 0.1),
+    "clear_lines/split": (
+        partial(engine_calls, partial(clearing_engine, range(BOTTOM - 6, BOTTOM + 1, 2)), "clear_lines"), 0.1),
+    "snapshot": (snapshot_calls, 1),
+    "restore": (partial(snapshot_calls, restore=True), 1),
+    "draw": (draw_calls, 0.01),
+    "startup": (startup_calls, 0.00025),
+    "startup/full_init": (partial(startup_calls, full_init=True), 0.00025)
+}
+
+
+def time_calls(calls):
+    """Run every call once and return the mean time per call in nanoseconds"""
+    clock = time.perf_counter_ns
+    start = clock()
+    for call in calls:
+        call()
+    return (clock() - start) / len(calls)
+
+
+def run_benchmark(build, count, repeats):
+    """Time one benchmark: fresh calls are built (untimed) before every run"""
+    samples = [time_calls(build(count)) for _ in range(repeats)]
+    return {
+        "calls": count,
+        "repeats": repeats,
+        "min_ns": min(samples),
+        "median_ns": statistics.median(samples),
+        "mean_ns": statistics.fmean(samples),
+        "stdev_ns": statistics.pstdev(samples),
+        "ops_per_second": 1e9 / min(samples)
+    }
+
+
+def environment():
+    """Describe the machine and interpreter the numbers were taken on"""
+    info = {
+        "python": platform.python_version(),
+        "implementation": platform.python_implementation(),
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "cpus": os.cpu_count()
+    }
+    try:
+        import pygame
+        info["pygame"] = pygame.version.ver
+        info["sdl"] = ".".join(map(str, pygame.get_sdl_version()))
+    except ImportError:
+        pass
+    return info
+
+
+def compare(results, baseline):
+    """Get the percent change in median time per benchmark present in both runs"""
+    changes = {}
+    for name, result in results.items():
+        before = baseline.get(name)
+        if before:
+            changes[name] = (result["median_ns"] / before["median_ns"] - 1) * 100
+    return changes
+
+
+def main():
+    """Run the selected benchmarks and write the results as JSON"""
+    parser = argparse.ArgumentParser(description="Benchmark Tetris engine hot paths and rendering")
+    parser.add_argument("--only", metavar="NAME", action="append",
+                        help="run benchmarks whose name starts with NAME (repeatable)")
+    parser.add_argument("--repeat", type=int, default=DEFAULT_REPEATS,
+                        help="timed runs per benchmark")
+    parser.add_argument("--scale", type=float, default=1.0,
+                        help="multiply the number of calls per run")
+    parser.add_argument("--output", metavar="FILE",
+                        help="write the JSON results to FILE (default: stdout)")
+    parser.add_argument("--compare", metavar="FILE",
+                        help="print the change against an earlier results file")
+    parser.add_argument("--max-slowdown", type=float, metavar="PERCENT",
+                        help="with --compare, exit 1 if any benchmark got slower by more than PERCENT")
+    parser.add_argument("--list", action="store_true", help="list benchmark names and exit")
+    args = parser.parse_args()
+    
+    if args.list:
+        print("\n".join(BENCHMARKS))
+        return
+    
+    names = [name for name in BENCHMARKS
+             if not args.only or any(name.startswith(prefix) for prefix in args.only)]
+    if not names:
+        parser.error(f"no benchmark matches {args.only}")
+    
+    results = {}
+    for name in names:
+        build, weight = BENCHMARKS[name]
+        count = max(1, int(DEFAULT_CALLS * weight * args.scale))
+        results[name] = result = run_benchmark(build, count, args.repeat)
+        print(f"{name:28} {result['median_ns'] / 1000:10.3f} us  "
+              f"(min {result['min_ns'] / 1000:.3f}, stdev {result['stdev_ns'] / 1000:.3f})", file=sys.stderr)
+    
+    report = {
+        "version": BENCHMARK_VERSION,
+        "timestamp": time.time(),
+        "environment": environment(),
+        "benchmarks": results
+    }
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+    
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        if baseline.get("version") != BENCHMARK_VERSION:
+            sys.exit(f"{args.compare}: unsupported benchmark version {baseline.get('version')}")
+        changes = compare(results, baseline["benchmarks"])
+        for name, change in changes.items():
+            print(f"{name:28} {change:+7.1f}%", file=sys.stderr)
+        if args.max_slowdown is not None and any(change > args.max_slowdown for change in changes.values()):
+            print(f"slower than {args.compare} by more than {args.max_slowdown}%", file=sys.stderr)
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,326 @@
+"""
+Bitboard Playfield
+Occupancy is stored as one integer bitmask per row (bit x set = column x
+filled) and colors as palette indices in a separate bytearray, so collision
+and full-row checks are a few bitwise operations. Column heights, row fill
+counts, holes and bumpiness are kept up to date as cells are placed and rows
+cleared, so reading them never rescans the grid. Rows above the stack are
+known to be empty and are skipped by line clears, clear() and restore() and
+left out of snapshots, so tall boards cost what their stack costs.
+"""
+
+from array import array
+from operator import sub
+
+from constants import GRID_WIDTH, GRID_HEIGHT, BLACK, PIECE_COLORS
+
+# Palette index 0 is an empty cell, pieces follow in PIECE_COLORS order
+PALETTE = (BLACK,) + tuple(PIECE_COLORS.values())
+COLOR_INDEX = {shape_type: index + 1 for index, shape_type in enumerate(PIECE_COLORS)}
+
+
+class Board:
+    """Tetris playfield stored as row bitmasks plus a palette-index color plane
+    
+    colors may be given as a writable buffer of width * height bytes (such as
+    a memoryview slice of a larger observation buffer); the board then keeps
+    its color plane there and updates it in place.
+    
+    heights and row_counts are read-only views of the feature index; writing
+    rows or colors directly bypasses it (use set_cell(), or rebuild_index()
+    afterwards).
+    """
+    
+    def __init__(self, width=GRID_WIDTH, height=GRID_HEIGHT, colors=None):
+        self.width = width
+        self.height = height
+        self.full_row = (1 << width) - 1
+        self.rows = [0] * height
+        if colors is None:
+            colors = bytearray(width * height)
+        elif len(colors) != width * height:
+            raise ValueError(f"color buffer holds {len(colors)} cells, board has {width * height}")
+        self.colors = colors
+        
+        # Feature index
+        self._heights = array("I", [0]) * width  # Per column: rows from the floor to its top block
+        self._row_counts = array("I", [0]) * height  # Per row: filled cells
+        self.heights = memoryview(self._heights).toreadonly()
+        self.row_counts = memoryview(self._row_counts).toreadonly()
+        self._filled = 0
+        self._aggregate_height = 0
+        self._bumpiness = 0
+        self._stack_height = 0
+    
+    @property
+    def stack_height(self):
+        """Rows from the floor to the highest block (every row above is empty)"""
+        return self._stack_height
+    
+    @property
+    def stack_top(self):
+        """Index of the highest row that can hold a block (height when the board is empty)"""
+        return self.height - self._stack_height
+    
+    @property
+    def filled_cells(self):
+        """Number of filled cells"""
+        return self._filled
+    
+    @property
+    def aggregate_height(self):
+        """Sum of the column heights"""
+        return self._aggregate_height
+    
+    @property
+    def holes(self):
+        """Number of empty cells with a filled cell somewhere above them"""
+        return self._aggregate_height - self._filled
+    
+    @property
+    def bumpiness(self):
+        """Sum of the height differences between neighbouring columns"""
+        return self._bumpiness
+    
+    def _set_height(self, x, height):
+        """Change one column height, keeping the aggregate, bumpiness and stack height in step"""
+        heights = self._heights
+        old = heights[x]
+        if x > 0:
+            left = heights[x - 1]
+            self._bumpiness += abs(height - left) - abs(old - left)
+        if x < self.width - 1:
+            right = heights[x + 1]
+            self._bumpiness += abs(height - right) - abs(old - right)
+        self._aggregate_height += height - old
+        heights[x] = height
+        if height > self._stack_height:
+            self._stack_height = height
+        elif old == self._stack_height and height < old:
+            self._stack_height = max(heights)
+    
+    def _column_height(self, x, start=0):
+        """Scan column x down from row start for its highest filled cell"""
+        bit = 1 << x
+        rows = self.rows
+        for y in range(start, self.height):
+            if rows[y] & bit:
+                return self.height - y
+        return 0
+    
+    def rebuild_index(self, top=0):
+        """Recompute the feature index from rows (after they were overwritten)
+        
+        Rows above top must be empty; they are not looked at, except those
+        below the stack top the index had before, which are recounted.
+        """
+        height = self.height
+        rows = self.rows
+        row_counts = self._row_counts
+        start = min(top, height - self._stack_height)  # Rows above both hold no counts
+        if start < height:
+            row_counts[start:] = array("I", map(int.bit_count, rows[start:]))
+        self._filled = sum(row_counts[start:])
+        
+        heights = self._heights
+        heights[:] = array("I", [0]) * self.width
+        full = self.full_row
+        seen = 0
+        for y in range(top, height):
+            row = rows[y]
+            # Columns whose top block is on this row
+            new = row & ~seen
+            if new:
+                while new:
+                    bit = new & -new
+                    heights[bit.bit_length() - 1] = height - y
+                    new ^= bit
+                seen |= row
+                if seen == full:
+                    break
+        
+        self._aggregate_height = sum(heights)
+        self._bumpiness = sum(map(abs, map(sub, heights, heights[1:])))
+        self._stack_height = max(heights)
+    
+    def clear(self):
+        """Empty the whole board (only the rows from the top of the stack down are written)"""
+        stack_height = self._stack_height
+        if stack_height:  # An exported array refuses even an empty slice assignment at its end
+            top = self.stack_top
+            self.rows[top:] = [0] * stack_height
+            self.colors[top * self.width:] = bytes(stack_height * self.width)
+            self._row_counts[top:] = array("I", [0]) * stack_height
+        self._heights[:] = array("I", [0]) * self.width
+        self._filled = 0
+        self._aggregate_height = 0
+        self._bumpiness = 0
+        self._stack_height = 0
+    
+    def snapshot(self):
+        """Get an immutable copy of the board as (row bitmask tuple, packed color bytes)
+        
+        Only the rows from the top of the stack down are stored; the rows
+        above them are empty.
+        """
+        top = self.stack_top
+        return tuple(self.rows[top:]), bytes(self.colors[top * self.width:])
+    
+    def restore(self, rows, colors):
+        """Overwrite the board with a copy taken by snapshot()
+        
+        Only the rows of the current stack and the copy's are written.
+        """
+        top = self.height - len(rows)
+        split = top * self.width
+        old_top = self.stack_top
+        if old_top < top:
+            # Empty the rows of the current stack above the copy's
+            self.rows[old_top:top] = [0] * (top - old_top)
+            self.colors[old_top * self.width:split] = bytes(split - old_top * self.width)
+        self.rows[top:] = rows
+        self.colors[split:] = colors
+        self.rebuild_index(top)
+    
+    @classmethod
+    def from_snapshot(cls, width, height, rows, colors):
+        """Create a board holding a copy taken by snapshot()"""
+        board = cls(width, height)
+        board.restore(rows, colors)
+        return board
+    
+    def __reduce__(self):
+        # The index views cannot be pickled, so copies and pickles are rebuilt
+        # from a snapshot (into a color plane of their own)
+        return self.from_snapshot, (self.width, self.height) + self.snapshot()
+    
+    def set_cell(self, x, y, color_index):
+        """Fill the cell at (x, y) with a palette index, or empty it with 0"""
+        bit = 1 << x
+        rows = self.rows
+        self.colors[y * self.width + x] = color_index
+        if color_index:
+            if rows[y] & bit:
+                return
+            rows[y] |= bit
+            self._row_counts[y] += 1
+            self._filled += 1
+            if self.height - y > self._heights[x]:
+                self._set_height(x, self.height - y)
+        else:
+            if not rows[y] & bit:
+                return
+            rows[y] &= ~bit
+            self._row_counts[y] -= 1
+            self._filled -= 1
+            if self.height - y == self._heights[x]:
+                self._set_height(x, self._column_height(x, y + 1))
+    
+    def collides_rows(self, row_masks, y):
+        """Check precomputed (dy, mask) row masks placed with their origin at row y
+        
+        row_masks is None when the piece sticks out past a side wall.
+        """
+        if row_masks is None:
+            return True
+        
+        height = self.height
+        rows = self.rows
+        for dy, mask in row_masks:
+            row = y + dy
+            if row >= height:
+                return True
+            if row >= 0 and rows[row] & mask:
+                return True
+        
+        return False
+    
+    def place(self, cells, color_index, dx=0, dy=0):
+        """Fill cells (shifted by dx, dy) with a palette index, dropping any above the top"""
+        width = self.width
+        height = self.height
+        rows = self.rows
+        row_counts = self._row_counts
+        heights = self._heights
+        for x, y in cells:
+            x += dx
+            y += dy
+            if y >= 0:
+                bit = 1 << x
+                if not rows[y] & bit:
+                    rows[y] |= bit
+                    row_counts[y] += 1
+                    self._filled += 1
+                    if height - y > heights[x]:
+                        self._set_height(x, height - y)
+                self.colors[y * width + x] = color_index
+    
+    def full_rows(self, top=0, bottom=None):
+        """Get the indices of completely filled rows, bottom to top
+        
+        Only rows top to bottom (inclusive) are checked, by default every row
+        of the stack.
+        """
+        full = self.full_row
+        rows = self.rows
+        if bottom is None or bottom >= self.height:
+            bottom = self.height - 1
+        return [y for y in range(bottom, max(top, self.stack_top) - 1, -1) if rows[y] == full]
+    
+    def clear_rows(self, lines):
+        """Remove the given rows and shift everything above them down in place"""
+        if not lines:
+            return 0
+        
+        width = self.width
+        height = self.height
+        rows = self.rows
+        colors = self.colors
+        row_counts = self._row_counts
+        heights = self._heights
+        cleared = set(lines)
+        count = len(cleared)
+        stack_top = height - self._stack_height
+        if any(row_counts[y] != width for y in cleared):
+            partial = True  # Not full rows: the index is rebuilt afterwards
+            # They may even lie above the stack, so shift from the highest of them
+            stack_top = min(stack_top, min(cleared))
+        else:
+            # Full rows hold a block of every column, so every column drops by
+            # count (which leaves the bumpiness as it was); a column whose top
+            # block was on the highest cleared row is rescanned once rows moved
+            partial = False
+            peak = height - min(cleared)
+            rescan = [x for x in range(width) if heights[x] == peak]
+            for x in range(width):
+                heights[x] -= count
+            self._aggregate_height -= count * width
+            self._stack_height -= count
+        
+        # Rows below the lowest cleared line never move, rows above the old
+        # stack were empty and stay empty
+        dst = max(cleared)
+        for src in range(dst, stack_top - 1, -1):
+            if src in cleared:
+                continue
+            if src != dst:
+                rows[dst] = rows[src]
+                row_counts[dst] = row_counts[src]
+                colors[dst * width:(dst + 1) * width] = colors[src * width:(src + 1) * width]
+            dst -= 1
+        
+        # Open up the rows freed at the top of the stack
+        for y in range(stack_top, dst + 1):
+            rows[y] = 0
+            row_counts[y] = 0
+        colors[stack_top * width:(dst + 1) * width] = bytes((dst + 1 - stack_top) * width)
+        
+        if partial:
+            self.rebuild_index(stack_top)
+        else:
+            self._filled -= count * width
+            start = height - peak + count  # Rescanned columns are empty above this row
+            for x in rescan:
+                self._set_height(x, self._column_height(x, start))
+        
+        return count
@@ -0,0 +1,222 @@
+"""
+Server Test Client
+Connects to server.py, keeps a local mirror of a match from its state and
+delta messages, and plays it with a bot agent or just watches. Can open many
+connections at once to load-test a server.
+
+Usage:
+    python client.py --match demo --agent placement --render
+    python client.py --match demo --spectate --render
+    python client.py --matches 200 --spectators 2 --agent random --duration 30
+"""
+
+import argparse
+import asyncio
+import json
+import sys
+import time
+
+from board import Board
+from constants import TICK_RATE
+from engine import Tetromino
+from server import DEFAULT_PORT, PROTOCOL_VERSION, encode
+from tournament import BUILTIN_AGENTS, load_agent
+
+
+class MatchView:
+    """A match rebuilt from server messages, shaped like a TetrisEngine
+    
+    Agents and TetrisGame read it exactly like a local engine.
+    """
+    
+    def __init__(self):
+        self.board = None
+        self.current_piece = None
+        self.next_piece = None
+        self.seed = None
+        self.ticks = 0
+        self.score = 0
+        self.level = 1
+        self.lines_cleared = 0
+        self.pieces_placed = 0
+        self.game_over = False
+        self.paused = False
+    
+    def upcoming(self, count):
+        """Get the upcoming shape types (the server only shares next_piece)"""
+        if count <= 0 or self.next_piece is None:
+            return ()
+        return (self.next_piece.shape_type,)
+    
+    def set_cell(self, index, color_index):
+        """Update one board cell (index is row-major)"""
+        y, x = divmod(index, self.board.width)
+        self.board.set_cell(x, y, color_index)
+    
+    def apply(self, message):
+        """Update the mirror from a 'state' or 'delta' message"""
+        if message["type"] == "state":
+            self.board = Board(message["width"], message["height"])
+            self.seed = message["seed"]
+            for index, color_index in enumerate(bytes.fromhex(message["cells"])):
+                if color_index:
+                    self.set_cell(index, color_index)
+        else:
+            cells = message.get("cells", ())
+            for i in range(0, len(cells), 2):
+                self.set_cell(cells[i], cells[i + 1])
+        
+        self.ticks = message.get("tick", self.ticks)
+        if "piece" in message:
+            piece = message["piece"]
+            self.current_piece = Tetromino(*piece) if piece else None
+        if "next" in message:
+            self.next_piece = Tetromino(message["next"]) if message["next"] else None
+        self.score = message.get("score", self.score)
+        self.level = message.get("level", self.level)
+        self.lines_cleared = message.get("lines", self.lines_cleared)
+        self.pieces_placed = message.get("pieces", self.pieces_placed)
+        self.game_over = message.get("game_over", self.game_over)
+
+
+class Traffic:
+    """Bytes and messages received, summed over every connection"""
+    
+    def __init__(self):
+        self.bytes = 0
+        self.messages = 0
+
+
+async def play(host, port, match_id, agent=None, spectate=False, seed=None, render=False,
+               traffic=None, until=None, joined=None):
+    """Join a match and mirror it until the game ends (or until the loop time until)
+    
+    A player with an agent sends the agent's actions after every update; a
+    player without one just watches its own game fall. The joined event, if
+    given, is set once the first state arrives. Returns the view.
+    """
+    reader, writer = await asyncio.open_connection(host, port)
+    join = {"type": "join", "match": match_id, "role": "spectator" if spectate else "player"}
+    if seed is not None:
+        join["seed"] = seed
+    writer.write(encode(join))
+    
+    view = MatchView()
+    game = None
+    last_draw = 0.0
+    loop = asyncio.get_running_loop()
+    try:
+        while until is None or loop.time() < until:
+            timeout = None if until is None else max(until - loop.time(), 0)
+            try:
+                line = await asyncio.wait_for(reader.readline(), timeout)
+            except asyncio.TimeoutError:
+                break
+            if not line:
+                break
+            if traffic:
+                traffic.bytes += len(line)
+                traffic.messages += 1
+            
+            message = json.loads(line)
+            kind = message["type"]
+            if kind == "hello":
+                if message["version"] != PROTOCOL_VERSION:
+                    raise ValueError(f"server speaks protocol {message['version']}, client {PROTOCOL_VERSION}")
+                continue
+            if kind == "error":
+                raise ValueError(f"server error: {message['message']}")
+            if kind not in ("state", "delta"):
+                continue
+            
+            first = view.board is None
+            view.apply(message)
+            if first:
+                if agent:
+                    agent.reset(view)
+                if joined:
+                    joined.set()
+            if agent and not spectate and not view.game_over:
+                actions = agent.act(view)
+                if actions:
+                    writer.write(encode({"type": "input", "actions": actions}))
+            
+            if render:
+                if game is None:
+                    # Only pull in Pygame when something is actually shown
+                    from tetris import TetrisGame
+                    game = TetrisGame(engine=view)
+                    game.open_display()
+                now = loop.time()
+                if now - last_draw >= 1.0 / TICK_RATE:
+                    game.draw()
+                    game.pump_events()
+                    last_draw = now
+            
+            if view.game_over and not spectate:
+                break
+    finally:
+        writer.close()
+    return view
+
+
+async def load_test(args):
+    """Play many matches with their spectators at once and report the traffic"""
+    traffic = Traffic()
+    loop = asyncio.get_running_loop()
+    until = loop.time() + args.duration if args.duration else None
+    start = time.perf_counter()
+    
+    match_ids = [f"{args.match}-{i}" if args.matches > 1 else args.match for i in range(args.matches)]
+    tasks = []
+    joined = []
+    for i, match_id in enumerate(match_ids):
+        seed = args.seed + i if args.seed is not None else None
+        agent = load_agent(args.agent) if args.agent else None
+        joined.append(asyncio.Event())
+        tasks.append(asyncio.create_task(play(args.host, args.port, match_id, agent, args.spectate, seed,
+                                              args.render and i == 0, traffic, until, joined[-1])))
+    
+    # Extra spectators join once the players have created their matches
+    if args.spectators:
+        ready = asyncio.ensure_future(asyncio.gather(*(event.wait() for event in joined)))
+        await asyncio.wait([ready, *tasks], return_when=asyncio.FIRST_COMPLETED)
+        ready.cancel()
+    tasks += [asyncio.create_task(play(args.host, args.port, match_id, spectate=True, traffic=traffic, until=until))
+              for match_id in match_ids for _ in range(args.spectators)]
+    views = await asyncio.gather(*tasks)
+    
+    elapsed = time.perf_counter() - start
+    players = views[:args.matches]
+    print(f"{len(views)} connections, {traffic.messages} messages, {traffic.bytes / 1024:.1f} KiB "
+          f"in {elapsed:.1f}s ({traffic.bytes / elapsed / 1024:.1f} KiB/s)", file=sys.stderr)
+    for view in players[:10]:
+        print(f"seed={view.seed} ticks={view.ticks} score={view.score} lines={view.lines_cleared} "
+              f"game_over={view.game_over}", file=sys.stderr)
+
+
+def main():
+    """Connect to a server and play or watch"""
+    parser = argparse.ArgumentParser(description="Play or watch matches on a Tetris server")
+    parser.add_argument("--host", default="127.0.0.1", help="server address")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT, help="server TCP port")
+    parser.add_argument("--match", default="demo", help="match name (a prefix with --matches)")
+    parser.add_argument("--agent", help=f"bot to play with: {', '.join(sorted(BUILTIN_AGENTS))} or module:ClassName")
+    parser.add_argument("--spectate", action="store_true", help="watch an existing match instead of playing")
+    parser.add_argument("--seed", type=int, help="seed for a new match (incremented per match)")
+    parser.add_argument("--render", action="store_true", help="show the (first) match in a window")
+    parser.add_argument("--matches", type=int, default=1, help="matches to play at once")
+    parser.add_argument("--spectators", type=int, default=0, help="extra spectator connections per match")
+    parser.add_argument("--duration", type=float, metavar="SECONDS", help="disconnect after SECONDS")
+    args = parser.parse_args()
+    
+    try:
+        asyncio.run(load_test(args))
+    except (ConnectionError, ValueError) as error:
+        sys.exit(f"client: {error}")
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+"""
+Tetris Game Constants
+Board dimensions, colors, scoring rules and tetromino shapes shared by the
+headless engine and the Pygame front end.
+"""
+
+# Board dimensions
+GRID_WIDTH = 10
+GRID_HEIGHT = 20
+
+# Colors (RGB)
+BLACK = (0, 0, 0)
+WHITE = (255, 255, 255)
+GRAY = (128, 128, 128)
+CYAN = (0, 255, 255)      # I-piece
+YELLOW = (255, 255, 0)    # O-piece
+PURPLE = (128, 0, 128)    # T-piece
+GREEN = (0, 255, 0)       # S-piece
+RED = (255, 0, 0)         # Z-piece
+BLUE = (0, 0, 255)        # J-piece
+ORANGE = (255, 165, 0)    # L-piece
+
+# Game settings
+FALL_SPEED = 0.5  # Seconds per cell
+FAST_FALL_SPEED = 0.05
+SCORE_PER_LINE = 100
+SCORE_MULTIPLIER = {1: 1, 2: 3, 3: 5, 4: 8}  # Bonus for multiple lines
+
+# Fixed-timestep simulation (deterministic play, recording and replay)
+TICK_RATE = 60  # Ticks per second
+TICK_DT = 1.0 / TICK_RATE
+
+# Per-tick input actions (bit flags, combined with |)
+ACTION_LEFT = 1
+ACTION_RIGHT = 2
+ACTION_DOWN = 4
+ACTION_ROTATE = 8
+ACTION_PAUSE = 16
+
+# Tetromino shapes (relative coordinates)
+SHAPES = {
+    'I': [
+        [(0, 1), (1, 1), (2, 1), (3, 1)],
+        [(1, 0), (1, 1), (1, 2), (1, 3)],
+        [(0, 1), (1, 1), (2, 1), (3, 1)],
+        [(1, 0), (1, 1), (1, 2), (1, 3)]
+    ],
+    'O': [
+        [(0, 0), (1, 0), (0, 1), (1, 1)],
+        [(0, 0), (1, 0), (0, 1), (1, 1)],
+        [(0, 0), (1, 0), (0, 1), (1, 1)],
+        [(0, 0), (1, 0), (0, 1), (1, 1)]
+    ],
+    'T': [
+        [(1, 0), (0, 1), (1, 1), (2, 1)],
+        [(1, 0), (1, 1), (2, 1), (1, 2)],
+        [(0, 1), (1, 1), (2, 1), (1, 2)],
+        [(1, 0), (0, 1), (1, 1), (1, 2)]
+    ],
+    'S': [
+        [(1, 0), (2, 0), (0, 1), (1, 1)],
+        [(1, 0), (1, 1), (2, 1), (2, 2)],
+        [(1, 0), (2, 0), (0, 1), (1, 1)],
+        [(1, 0), (1, 1), (2, 1), (2, 2)]
+    ],
+    'Z': [
+        [(0, 0), (1, 0), (1, 1), (2, 1)],
+        [(2, 0), (1, 1), (2, 1), (1, 2)],
+        [(0, 0), (1, 0), (1, 1), (2, 1)],
+        [(2, 0), (1, 1), (2, 1), (1, 2)]
+    ],
+    'J': [
+        [(0, 0), (0, 1), (1, 1), (2, 1)],
+        [(1, 0), (2, 0), (1, 1), (1, 2)],
+        [(0, 1), (1, 1), (2, 1), (2, 2)],
+        [(1, 0), (1, 1), (0, 2), (1, 2)]
+    ],
+    'L': [
+        [(2, 0), (0, 1), (1, 1), (2, 1)],
+        [(1, 0), (1, 1), (1, 2), (2, 2)],
+        [(0, 1), (1, 1), (2, 1), (0, 2)],
+        [(0, 0), (1, 0), (1, 1), (1, 2)]
+    ]
+}
+
+# Color mapping for each piece type
+PIECE_COLORS = {
+    'I': CYAN,
+    'O': YELLOW,
+    'T': PURPLE,
+    'S': GREEN,
+    'Z': RED,
+    'J': BLUE,
+    'L': ORANGE
+}
@@ -0,0 +1,101 @@
+"""
+Keyboard Input Pipeline
+Turns timestamped key presses and releases into one ACTION_* mask per tick.
+Every press is applied on the next tick, even when the key was already let
+go; held left/right repeat after a delayed auto shift (DAS) at the auto
+repeat rate (ARR), and a held soft drop repeats every tick. Also remembers
+when each applied press happened, for input-to-present latency.
+"""
+
+from collections import deque
+
+from constants import ACTION_LEFT, ACTION_RIGHT, ACTION_DOWN
+
+# Delayed auto shift and auto repeat rate (seconds); an ARR shorter than a
+# tick repeats once per tick
+DEFAULT_DAS = 0.167
+DEFAULT_ARR = 0.033
+
+# The other horizontal direction
+OPPOSITE = {ACTION_LEFT: ACTION_RIGHT, ACTION_RIGHT: ACTION_LEFT}
+
+
+class InputController:
+    """Keyboard state and queued presses, read one tick at a time
+    
+    key_actions maps key codes to ACTION_* flags; several keys may share a
+    flag. Timestamps are seconds on any clock, as long as it is the one
+    passed to actions() and presented().
+    """
+    
+    def __init__(self, key_actions, das=DEFAULT_DAS, arr=DEFAULT_ARR):
+        self.key_actions = key_actions
+        self.das = das
+        self.arr = arr
+        self.presses = deque()  # (action, timestamp) not applied yet, oldest first
+        self.held = {}  # action -> keys currently holding it down
+        self.shift = 0  # Horizontal action that auto repeats (the last one pressed)
+        self.next_shift = 0.0  # When it repeats next
+        self.applied = []  # Timestamps of presses applied since the last presented()
+    
+    def key_down(self, key, timestamp):
+        """A key went down (keys that map to no action are ignored)"""
+        action = self.key_actions.get(key)
+        if not action:
+            return
+        keys = self.held.setdefault(action, set())
+        if not keys:  # A second key for a held action is not a new press
+            self.presses.append((action, timestamp))
+        keys.add(key)
+        if action in OPPOSITE:
+            self.shift = action
+            self.next_shift = timestamp + self.das
+    
+    def key_up(self, key, timestamp):
+        """A key went up"""
+        action = self.key_actions.get(key)
+        keys = self.held.get(action)
+        if not keys:
+            return
+        keys.discard(key)
+        if not keys and action == self.shift:
+            # Fall back to the other direction if it is still held, charging DAS again
+            other = OPPOSITE[action]
+            self.shift = other if self.held.get(other) else 0
+            self.next_shift = timestamp + self.das
+    
+    def release_all(self):
+        """Forget held keys (their key up events are lost once the window loses focus)"""
+        self.held.clear()
+        self.shift = 0
+    
+    def cancel(self):
+        """Drop presses that were not applied yet (after a reset or undo)"""
+        self.presses.clear()
+    
+    def actions(self, now):
+        """Get the action mask for a tick at time now
+        
+        Queued presses come first, at most one of each action per tick, so
+        two quick taps move twice on consecutive ticks.
+        """
+        mask = 0
+        presses = self.presses
+        while presses and not mask & presses[0][0]:
+            action, timestamp = presses.popleft()
+            mask |= action
+            self.applied.append(timestamp)
+        
+        shift = self.shift
+        if shift and self.next_shift <= now:
+            mask |= shift
+            self.next_shift = now + self.arr  # Repeats missed between ticks are dropped
+        if self.held.get(ACTION_DOWN):
+            mask |= ACTION_DOWN
+        return mask
+    
+    def presented(self, now):
+        """Get the latency (seconds) of every press applied since the last frame was presented at now"""
+        latencies = [now - timestamp for timestamp in self.applied]
+        self.applied.clear()
+        return latencies
@@ -0,0 +1,424 @@
+"""
+Headless Tetris Engine
+Pure-Python game rules (grid, pieces, scoring, leveling) with no Pygame
+dependency, so games can be simulated without a display.
+"""
+
+import random
+from collections import namedtuple
+
+from board import Board, COLOR_INDEX
+from constants import (
+    GRID_WIDTH, GRID_HEIGHT, FALL_SPEED, SCORE_PER_LINE, SCORE_MULTIPLIER, SHAPES,
+    PIECE_COLORS, TICK_DT, ACTION_LEFT, ACTION_RIGHT, ACTION_DOWN,
+    ACTION_ROTATE, ACTION_PAUSE
+)
+from pieces import PIECE_BOUNDS, PIECE_CELLS, ROTATION_KICKS, build_row_masks
+from randomizer import DEFAULT_LOOKAHEAD, GENERATORS, PIECE_TYPES
+
+# Smallest board side that every piece can spawn on
+MIN_BOARD_SIZE = 5
+
+# Immutable copy of everything TetrisEngine.restore needs to rewind a game.
+# The board is stored as a tuple of row bitmasks plus packed color bytes for
+# the rows from the top of the stack down, pieces as (shape_type, x, y,
+# rotation) tuples.
+GameSnapshot = namedtuple("GameSnapshot", (
+    "rows", "colors", "current_piece", "next_piece", "score", "level", "lines_cleared",
+    "pieces_placed", "fall_timer", "fall_speed", "ticks", "play_ticks", "game_over", "paused", "seed",
+    "rng_state", "queue"
+))
+
+
+class Tetromino:
+    """Represents a Tetris piece (tetromino)"""
+    
+    # Fixed attributes keep pieces small and quick to create and copy
+    __slots__ = ("shape_type", "x", "y", "rotation", "shape", "cells", "color", "color_index")
+    
+    def __init__(self, shape_type, x=GRID_WIDTH // 2 - 1, y=0, rotation=0):
+        self.reset(shape_type, x, y, rotation)
+    
+    def reset(self, shape_type, x=GRID_WIDTH // 2 - 1, y=0, rotation=0):
+        """Turn this object into a different piece (for reuse from a PiecePool)"""
+        self.shape_type = shape_type
+        self.x = x
+        self.y = y
+        self.rotation = rotation
+        self.shape = SHAPES[shape_type]
+        self.cells = PIECE_CELLS[shape_type]
+        self.color = PIECE_COLORS[shape_type]
+        self.color_index = COLOR_INDEX[shape_type]
+    
+    def state(self):
+        """Get the piece's position as a (shape_type, x, y, rotation) tuple"""
+        return self.shape_type, self.x, self.y, self.rotation
+    
+    def clone(self):
+        """Get an independent copy of the piece"""
+        return Tetromino(self.shape_type, self.x, self.y, self.rotation)
+    
+    def get_cells(self):
+        """Get the absolute coordinates of all cells in the current piece"""
+        cells = []
+        for dx, dy in self.cells[self.rotation]:
+            cells.append((self.x + dx, self.y + dy))
+        return cells
+    
+    def rotate(self):
+        """Rotate the piece clockwise"""
+        self.rotation = (self.rotation + 1) % 4
+
+
+class PiecePool:
+    """Recycled Tetromino objects, so spawning pieces allocates nothing in steady state"""
+    
+    def __init__(self):
+        self.free = []
+    
+    def acquire(self, shape_type, x=GRID_WIDTH // 2 - 1, y=0, rotation=0):
+        """Get a piece of shape_type at (x, y), reusing a released one if possible"""
+        if self.free:
+            piece = self.free.pop()
+            piece.reset(shape_type, x, y, rotation)
+            return piece
+        return Tetromino(shape_type, x, y, rotation)
+    
+    def release(self, piece):
+        """Hand back a piece the engine no longer uses (None is ignored)"""
+        if piece is not None:
+            self.free.append(piece)
+
+
+class TetrisEngine:
+    """Game state and rules, independent of any display or input device
+    
+    randomizer names the piece generator ('uniform' or 'bag', see
+    randomizer.GENERATORS); lookahead is how many pieces beyond next_piece
+    are known in advance (see upcoming()). width and height set the board
+    size in cells.
+    """
+    
+    def __init__(self, seed=None, randomizer="uniform", lookahead=DEFAULT_LOOKAHEAD,
+                 width=GRID_WIDTH, height=GRID_HEIGHT):
+        if width < MIN_BOARD_SIZE or height < MIN_BOARD_SIZE:
+            raise ValueError(f"board must be at least {MIN_BOARD_SIZE}x{MIN_BOARD_SIZE} cells, got {width}x{height}")
+        
+        # Every game gets an explicit seed so it can be reproduced
+        self.seed = seed if seed is not None else random.randrange(2 ** 32)
+        self.rng = random.Random(self.seed)
+        self.ticks = 0
+        self.play_ticks = 0  # Ticks spent in play: not paused, not over
+        
+        # Upcoming piece types, and the Tetromino objects they are put in
+        self.randomizer = randomizer
+        self.generator = GENERATORS[randomizer](self.rng, lookahead)
+        self.pool = PiecePool()
+        
+        # Observation buffer: one contiguous block of bytes holding
+        #   [0, W*H)          the board's palette indices (the board's own color plane)
+        #   [W*H, 2*W*H)      the falling piece's palette index where it is, else 0
+        #   [2*W*H, +types)   a one-hot of the next piece in PIECE_TYPES order
+        # Locking and line clears write straight into it; observe() refreshes
+        # the piece overlay and next piece only when they changed.
+        cells = width * height
+        self.observation = bytearray(2 * cells + len(PIECE_TYPES))
+        view = memoryview(self.observation)
+        self.observation_view = view
+        self.planes = view[:2 * cells].cast("B", (2, height, width))
+        self.piece_plane = view[cells:2 * cells]
+        self.next_one_hot = view[2 * cells:]
+        self.observed_piece = None
+        self.observed_cells = ()
+        self.observed_next = None
+        
+        # Game state
+        self.board = Board(width, height, view[:cells])
+        self.row_masks = build_row_masks(width)
+        self.spawn_x = width // 2 - 1
+        self.current_piece = None
+        self.next_piece = None
+        self.score = 0
+        self.level = 1
+        self.lines_cleared = 0
+        self.pieces_placed = 0
+        self.game_over = False
+        self.paused = False
+        self.fall_timer = 0
+        self.fall_speed = FALL_SPEED
+        
+        # Optional archive.GameLog told about every placement and line clear
+        self.log = None
+        
+        # Initialize first pieces
+        self.spawn_first_pieces()
+    
+    def spawn_first_pieces(self):
+        """Spawn a new game's first piece and its preview"""
+        self.spawn_piece()
+        # Uniform games draw the first preview twice, as they always have,
+        # so seeds keep their piece sequences; bag games start on a whole bag
+        if self.randomizer == "uniform":
+            self.pool.release(self.next_piece)
+            self.next_piece = self.create_random_piece()
+    
+    def create_random_piece(self):
+        """Create a random tetromino"""
+        return self.pool.acquire(self.generator.next_shape(), self.spawn_x)
+    
+    def upcoming(self, count):
+        """Get the shape types of the next count pieces, next_piece first"""
+        if count <= 0 or self.next_piece is None:
+            return ()
+        return (self.next_piece.shape_type,) + self.generator.peek(count - 1)
+    
+    def spawn_piece(self):
+        """Spawn a new piece at the top"""
+        if self.next_piece:
+            self.pool.release(self.current_piece)
+            self.current_piece = self.next_piece
+            self.current_piece.x = self.spawn_x
+            self.current_piece.y = 0
+        else:
+            self.current_piece = self.create_random_piece()
+        
+        self.next_piece = self.create_random_piece()
+        
+        # Check for game over
+        if self.check_collision(self.current_piece):
+            self.game_over = True
+    
+    def check_collision(self, piece, dx=0, dy=0):
+        """Check if piece collides with walls or other pieces"""
+        masks = self.row_masks[piece.shape_type][piece.rotation].get(piece.x + dx)
+        return self.board.collides_rows(masks, piece.y + dy)
+    
+    def check_rotation_collision(self, piece, dx=0):
+        """Check if rotation (after shifting by dx) would cause collision"""
+        next_rotation = (piece.rotation + 1) % 4
+        masks = self.row_masks[piece.shape_type][next_rotation].get(piece.x + dx)
+        return self.board.collides_rows(masks, piece.y)
+    
+    def lock_piece(self):
+        """Lock the current piece into the grid"""
+        piece = self.current_piece
+        self.board.place(piece.cells[piece.rotation], piece.color_index, piece.x, piece.y)
+        self.pieces_placed += 1
+        if self.log is not None:
+            self.log.placed(piece, self.ticks)
+        
+        # Check for full lines (only the rows the piece landed on can have filled up)
+        _, min_dy, _, max_dy = PIECE_BOUNDS[piece.shape_type][piece.rotation]
+        self.clear_lines(piece.y + min_dy, piece.y + max_dy)
+        
+        # Spawn next piece
+        self.spawn_piece()
+    
+    def clear_lines(self, top=0, bottom=None):
+        """Clear full horizontal lines (between rows top and bottom) and update score"""
+        lines_to_clear = self.board.full_rows(top, bottom)
+        
+        # If no lines to clear, return early
+        if not lines_to_clear:
+            return
+        
+        if self.log is not None:
+            self.log.cleared(self.pieces_placed - 1, lines_to_clear)
+        
+        # Shift the remaining rows down over the cleared ones
+        num_lines = self.board.clear_rows(lines_to_clear)
+        
+        # Update score
+        self.lines_cleared += num_lines
+        multiplier = SCORE_MULTIPLIER.get(num_lines, num_lines * 2)
+        self.score += SCORE_PER_LINE * multiplier * self.level
+        
+        # Level up every 10 lines
+        self.level = (self.lines_cleared // 10) + 1
+        self.fall_speed = max(0.05, FALL_SPEED - (self.level - 1) * 0.05)
+    
+    def move_piece(self, dx, dy):
+        """Move the current piece"""
+        if not self.check_collision(self.current_piece, dx, dy):
+            self.current_piece.x += dx
+            self.current_piece.y += dy
+            return True
+        return False
+    
+    def rotate_piece(self):
+        """Rotate the current piece, trying the shape's wall kicks in order"""
+        piece = self.current_piece
+        for dx in ROTATION_KICKS[piece.shape_type][piece.rotation]:
+            if not self.check_rotation_collision(piece, dx):
+                piece.x += dx
+                piece.rotate()
+                return True
+        return False
+    
+    def soft_drop(self):
+        """Move the piece down one cell and restart the fall timer"""
+        if self.move_piece(0, 1):
+            self.fall_timer = 0  # Reset timer for faster fall
+            return True
+        return False
+    
+    def toggle_pause(self):
+        """Pause or resume the game"""
+        self.paused = not self.paused
+    
+    def apply_actions(self, actions):
+        """Apply a bit mask of ACTION_* flags (one frame or tick of input)"""
+        if self.game_over:
+            return
+        
+        # Pause toggle
+        if actions & ACTION_PAUSE:
+            self.toggle_pause()
+        
+        if self.paused:
+            return
+        
+        # Movement
+        if actions & ACTION_LEFT:
+            self.move_piece(-1, 0)
+        if actions & ACTION_RIGHT:
+            self.move_piece(1, 0)
+        if actions & ACTION_DOWN:
+            self.soft_drop()
+        
+        # Rotation
+        if actions & ACTION_ROTATE:
+            self.rotate_piece()
+    
+    def step(self, actions=0):
+        """Advance one fixed tick: apply the tick's input, then TICK_DT of gravity"""
+        self.apply_actions(actions)
+        if not (self.game_over or self.paused):
+            self.play_ticks += 1
+        self.update(TICK_DT)
+        self.ticks += 1
+    
+    def update(self, dt):
+        """Advance the simulation by dt seconds"""
+        if self.game_over or self.paused:
+            return
+        
+        # Update fall timer
+        self.fall_timer += dt
+        
+        # Check if piece should fall
+        if self.fall_timer >= self.fall_speed:
+            self.fall_timer = 0
+            if not self.move_piece(0, 1):
+                self.lock_piece()
+    
+    def observe(self):
+        """Get the observation buffer (a memoryview, zero-copy) brought up to date
+        
+        For NumPy, np.frombuffer(engine.observe(), np.uint8) or
+        np.asarray(engine.planes) give views that track the game without copying.
+        """
+        piece = self.current_piece
+        state = piece.state() if piece and not self.game_over else None
+        if state != self.observed_piece:
+            plane = self.piece_plane
+            for index in self.observed_cells:
+                plane[index] = 0
+            cells = []
+            if state:
+                width = self.board.width
+                for dx, dy in piece.cells[piece.rotation]:
+                    y = piece.y + dy
+                    if y >= 0:
+                        cells.append(y * width + piece.x + dx)
+                for index in cells:
+                    plane[index] = piece.color_index
+            self.observed_cells = cells
+            self.observed_piece = state
+        
+        next_shape = self.next_piece.shape_type if self.next_piece else None
+        if next_shape != self.observed_next:
+            one_hot = self.next_one_hot
+            one_hot[:] = bytes(len(one_hot))
+            if next_shape:
+                one_hot[PIECE_TYPES.index(next_shape)] = 1
+            self.observed_next = next_shape
+        
+        return self.observation_view
+    
+    def snapshot(self):
+        """Capture the whole game state as an immutable GameSnapshot"""
+        rows, colors = self.board.snapshot()
+        return GameSnapshot(
+            rows, colors,
+            self.current_piece.state() if self.current_piece else None,
+            self.next_piece.state() if self.next_piece else None,
+            self.score, self.level, self.lines_cleared, self.pieces_placed,
+            self.fall_timer, self.fall_speed, self.ticks, self.play_ticks, self.game_over, self.paused,
+            self.seed, self.rng.getstate(), tuple(self.generator.queue)
+        )
+    
+    def restore(self, snapshot):
+        """Return the game to a state captured by snapshot()"""
+        self.board.restore(snapshot.rows, snapshot.colors)
+        pool = self.pool
+        pool.release(self.current_piece)
+        pool.release(self.next_piece)
+        self.current_piece = pool.acquire(*snapshot.current_piece) if snapshot.current_piece else None
+        self.next_piece = pool.acquire(*snapshot.next_piece) if snapshot.next_piece else None
+        self.score = snapshot.score
+        self.level = snapshot.level
+        self.lines_cleared = snapshot.lines_cleared
+        self.pieces_placed = snapshot.pieces_placed
+        self.fall_timer = snapshot.fall_timer
+        self.fall_speed = snapshot.fall_speed
+        self.ticks = snapshot.ticks
+        self.play_ticks = snapshot.play_ticks
+        self.game_over = snapshot.game_over
+        self.paused = snapshot.paused
+        self.seed = snapshot.seed
+        self.rng.setstate(snapshot.rng_state)
+        self.generator.clear()
+        self.generator.queue.extend(snapshot.queue)
+        if self.log is not None:
+            self.log.rewind(snapshot.pieces_placed)
+    
+    @classmethod
+    def from_snapshot(cls, snapshot, randomizer="uniform", lookahead=DEFAULT_LOOKAHEAD,
+                      width=GRID_WIDTH, height=GRID_HEIGHT, log=None):
+        """Create an engine playing the game captured by snapshot()"""
+        engine = cls(snapshot.seed, randomizer, lookahead, width, height)
+        engine.restore(snapshot)
+        engine.log = log
+        return engine
+    
+    def __reduce__(self):
+        # The observation buffer's views cannot be pickled, so copy.deepcopy()
+        # and pickle rebuild the engine, with fresh views, from a snapshot
+        board = self.board
+        return self.from_snapshot, (self.snapshot(), self.randomizer, self.generator.lookahead,
+                                    board.width, board.height, self.log)
+    
+    def reset(self, seed=None):
+        """Reset the game (with a new seed unless one is given)"""
+        self.seed = seed if seed is not None else random.randrange(2 ** 32)
+        self.rng.seed(self.seed)
+        self.generator.clear()
+        self.ticks = 0
+        self.play_ticks = 0
+        self.board.clear()
+        self.score = 0
+        self.level = 1
+        self.lines_cleared = 0
+        self.pieces_placed = 0
+        self.game_over = False
+        self.paused = False
+        self.fall_timer = 0
+        self.fall_speed = FALL_SPEED
+        if self.log is not None:
+            self.log.clear()
+        self.pool.release(self.current_piece)
+        self.pool.release(self.next_piece)
+        self.current_piece = None
+        self.next_piece = None
+        self.spawn_first_pieces()
@@ -0,0 +1,61 @@
+"""
+Precomputed Piece Tables
+Cells, bounding boxes, wall-kick offsets and per-column row masks for every
+shape and rotation, built once so movement and rotation tests never allocate.
+"""
+
+from functools import lru_cache
+
+from constants import GRID_WIDTH, SHAPES
+
+# Horizontal offsets tried, in order, when a rotation is blocked
+WALL_KICKS = (0, -1, 1, -2, 2)
+
+# Cells for each shape and rotation as tuples of (dx, dy)
+PIECE_CELLS = {
+    shape_type: tuple(tuple(cells) for cells in rotations)
+    for shape_type, rotations in SHAPES.items()
+}
+
+
+def _bounds(cells):
+    """Get (min_dx, min_dy, max_dx, max_dy) of a set of cells"""
+    xs = [dx for dx, dy in cells]
+    ys = [dy for dx, dy in cells]
+    return (min(xs), min(ys), max(xs), max(ys))
+
+
+# Bounding box for each shape and rotation
+PIECE_BOUNDS = {
+    shape_type: tuple(_bounds(cells) for cells in rotations)
+    for shape_type, rotations in PIECE_CELLS.items()
+}
+
+# Kick offsets to try when rotating out of each rotation
+ROTATION_KICKS = {
+    shape_type: tuple(WALL_KICKS for _ in rotations)
+    for shape_type, rotations in PIECE_CELLS.items()
+}
+
+
+@lru_cache(maxsize=None)
+def build_row_masks(width=GRID_WIDTH):
+    """Build shape -> rotation -> {x: ((dy, mask), ...)} for every in-bounds column
+    
+    Columns where the piece would stick out of the board are left out, so a
+    missing entry means a wall collision.
+    """
+    tables = {}
+    for shape_type, rotations in PIECE_CELLS.items():
+        per_rotation = []
+        for cells, (min_dx, _, max_dx, _) in zip(rotations, PIECE_BOUNDS[shape_type]):
+            by_column = {}
+            for x in range(-min_dx, width - max_dx):
+                masks = {}
+                for dx, dy in cells:
+                    masks[dy] = masks.get(dy, 0) | (1 << (x + dx))
+                # Lowest row first: floor and stack hits are found soonest
+                by_column[x] = tuple(sorted(masks.items(), reverse=True))
+            per_rotation.append(by_column)
+        tables[shape_type] = tuple(per_rotation)
+    return tables
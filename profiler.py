@@ -0,0 +1,188 @@
+"""
+Frame Profiler
+Per-phase frame timers (input, update, grid draw, UI draw, flip) with
+rolling percentiles, dropped-frame counting, an input-to-present latency
+histogram, overlay text for the game window and CSV/JSON trace export.
+"""
+
+import csv
+import json
+import time
+from collections import deque
+
+# Phases of one frame of TetrisGame.run, in the order they happen
+PHASES = ("input", "update", "grid", "ui", "flip")
+
+# Trace columns: time since the previous frame started, then each phase
+COLUMNS = ("interval",) + PHASES
+
+# Input latency histogram: one bucket per millisecond, the last one open-ended
+LATENCY_BUCKETS = 100
+
+
+def percentile(sorted_values, p):
+    """Get the p-th percentile (nearest rank) of an already sorted sequence"""
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(len(sorted_values) - 1, int(len(sorted_values) * p / 100))]
+
+
+def summarize(values):
+    """Get p50/p95/p99/max of a sequence of seconds, in milliseconds"""
+    values = sorted(values)
+    return {
+        "p50": percentile(values, 50) * 1000,
+        "p95": percentile(values, 95) * 1000,
+        "p99": percentile(values, 99) * 1000,
+        "max": (values[-1] if values else 0.0) * 1000
+    }
+
+
+class FrameProfiler:
+    """Times the phases of every frame and keeps rolling statistics
+    
+    Call begin_frame() at the top of the loop, mark(phase) as each phase
+    finishes (the time since the previous mark is charged to it) and
+    end_frame() at the bottom. Phases that do not run in a frame count as 0.
+    """
+    
+    def __init__(self, target_fps, window=600, keep_trace=False, clock=time.perf_counter):
+        self.frame_budget = 1.0 / target_fps
+        self.clock = clock
+        self.samples = {column: deque(maxlen=window) for column in COLUMNS}
+        self.work_times = deque(maxlen=window)  # Sum of the phases per frame
+        self.trace = [] if keep_trace else None  # Every frame, for export
+        self.frames = 0
+        self.dropped_frames = 0
+        
+        # Time from each key press to the first frame presented after it was applied
+        self.latencies = deque(maxlen=window)
+        self.latency_trace = [] if keep_trace else None
+        self.latency_histogram = [0] * (LATENCY_BUCKETS + 1)
+        
+        self.current = dict.fromkeys(PHASES, 0.0)
+        self.frame_start = None
+        self.last_mark = clock()
+        
+        # Debug overlay (text refreshed a few times a second, not every frame)
+        self.show_overlay = False
+        self.overlay_every = 30
+        self.overlay_lines = ()
+    
+    def begin_frame(self, fps=None):
+        """Start timing a frame
+        
+        fps is the rate the loop is capped at for this frame, when it was
+        lowered on purpose (e.g. in the background); frames are only counted
+        as dropped against that rate.
+        """
+        frame_budget = 1.0 / fps if fps else self.frame_budget
+        now = self.clock()
+        interval = now - self.frame_start if self.frame_start is not None else 0.0
+        current = self.current
+        for phase in PHASES:
+            current[phase] = 0.0  # Drop marks made outside a frame
+        current["interval"] = interval
+        
+        # A frame that took n budgets means n - 1 display refreshes were missed
+        if interval > frame_budget * 1.5:
+            self.dropped_frames += round(interval / frame_budget) - 1
+        
+        self.frame_start = now
+        self.last_mark = now
+    
+    def skip_gap(self):
+        """Forget when the last frame started (after the loop slept on purpose)"""
+        self.frame_start = None
+    
+    def mark(self, phase):
+        """Charge the time since the last mark to phase"""
+        now = self.clock()
+        self.current[phase] += now - self.last_mark
+        self.last_mark = now
+    
+    def end_frame(self):
+        """Finish the frame and add it to the statistics"""
+        current = self.current
+        row = tuple(current.get(column, 0.0) for column in COLUMNS)
+        for column, value in zip(COLUMNS, row):
+            self.samples[column].append(value)
+            current[column] = 0.0
+        self.work_times.append(sum(row[1:]))
+        if self.trace is not None:
+            self.trace.append(row)
+        
+        self.frames += 1
+        if self.show_overlay and self.frames % self.overlay_every == 0:
+            self.overlay_lines = self.format_overlay()
+    
+    def record_latency(self, seconds):
+        """Add one press's input-to-present latency"""
+        self.latencies.append(seconds)
+        if self.latency_trace is not None:
+            self.latency_trace.append(seconds)
+        self.latency_histogram[min(int(seconds * 1000), LATENCY_BUCKETS)] += 1
+    
+    def toggle_overlay(self):
+        """Show or hide the debug overlay"""
+        self.show_overlay = not self.show_overlay
+        self.overlay_lines = self.format_overlay() if self.show_overlay else ()
+    
+    def stats(self):
+        """Get rolling statistics over the most recent frames (milliseconds)"""
+        intervals = self.samples["interval"]
+        mean_interval = sum(intervals) / len(intervals) if intervals else 0.0
+        return {
+            "frames": self.frames,
+            "dropped_frames": self.dropped_frames,
+            "fps": 1.0 / mean_interval if mean_interval else 0.0,
+            "frame": summarize(self.work_times),
+            "interval": summarize(intervals),
+            "phases": {phase: summarize(self.samples[phase]) for phase in PHASES},
+            "input_latency": summarize(self.latencies)
+        }
+    
+    def format_overlay(self):
+        """Get the overlay's text lines for the current statistics"""
+        stats = self.stats()
+        lines = [
+            f"FPS {stats['fps']:.1f}  drops {stats['dropped_frames']}",
+            "ms     p50 / p95 / p99"
+        ]
+        for name, summary in [("frame", stats["frame"])] + list(stats["phases"].items()):
+            lines.append(f"{name:7}{summary['p50']:.2f} / {summary['p95']:.2f} / {summary['p99']:.2f}")
+        if self.latencies:
+            summary = stats["input_latency"]
+            lines.append(f"input  {summary['p50']:.2f} / {summary['p95']:.2f} / {summary['p99']:.2f}  lag")
+        return tuple(lines)
+    
+    def save(self, path):
+        """Write the trace as CSV (one row per frame) or JSON (summary, latencies and frames)"""
+        frames = self.trace if self.trace is not None else list(zip(*self.samples.values()))
+        if path.endswith(".csv"):
+            with open(path, "w", newline="") as f:
+                writer = csv.writer(f)
+                writer.writerow(["frame"] + [f"{column}_ms" for column in COLUMNS])
+                for index, row in enumerate(frames):
+                    writer.writerow([index] + [f"{value * 1000:.4f}" for value in row])
+            return
+        
+        # The summary covers the whole trace, not just the rolling window
+        columns = list(zip(*frames)) or [()] * len(COLUMNS)
+        summary = {
+            "frames": len(frames),
+            "dropped_frames": self.dropped_frames,
+            "frame": summarize([sum(row[1:]) for row in frames]),
+            "interval": summarize(columns[0]),
+            "phases": {phase: summarize(values) for phase, values in zip(PHASES, columns[1:])},
+            "input_latency": summarize(self.latency_trace if self.latency_trace is not None else self.latencies)
+        }
+        with open(path, "w") as f:
+            json.dump({
+                "target_fps": 1.0 / self.frame_budget,
+                "columns": list(COLUMNS),
+                "summary": summary,
+                # Presses per millisecond of latency; the last bucket counts everything slower
+                "input_latency_histogram": self.latency_histogram,
+                "frames": [[round(value * 1000, 4) for value in row] for row in frames]
+            }, f)
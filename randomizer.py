@@ -0,0 +1,80 @@
+"""
+Piece Generators
+Seeded sources of upcoming piece types, refilled in batches into a lookahead
+queue that the engine, the renderer and agents can peek into.
+"""
+
+from collections import deque
+
+from constants import SHAPES
+
+# Shape names in a fixed order (avoids rebuilding the key list per spawn)
+PIECE_TYPES = tuple(SHAPES)
+
+# Pieces known beyond next_piece
+DEFAULT_LOOKAHEAD = 5
+
+
+class PieceGenerator:
+    """Base class: a queue of upcoming shape types drawn from a random.Random"""
+    
+    def __init__(self, rng, lookahead=DEFAULT_LOOKAHEAD):
+        self.rng = rng
+        self.lookahead = lookahead
+        self.queue = deque()
+    
+    def refill(self):
+        """Append one batch of shape types to the queue"""
+        raise NotImplementedError
+    
+    def next_shape(self):
+        """Take the next shape type off the queue"""
+        queue = self.queue
+        while len(queue) <= self.lookahead:
+            self.refill()
+        return queue.popleft()
+    
+    def peek(self, count):
+        """Get the next count shape types without taking them"""
+        queue = self.queue
+        while len(queue) < count:
+            self.refill()
+        return tuple(queue[i] for i in range(count))
+    
+    def clear(self):
+        """Forget the queued shapes (after the RNG was reseeded)"""
+        self.queue.clear()
+
+
+class UniformGenerator(PieceGenerator):
+    """Every piece is an independent uniform pick (same sequence as before batching)"""
+    
+    BATCH_SIZE = 7
+    
+    def refill(self):
+        choice = self.rng.choice
+        append = self.queue.append
+        for _ in range(self.BATCH_SIZE):
+            append(choice(PIECE_TYPES))
+
+
+class BagGenerator(PieceGenerator):
+    """7-bag: each run of seven pieces is a shuffled copy of all seven shapes"""
+    
+    def __init__(self, rng, lookahead=DEFAULT_LOOKAHEAD):
+        super().__init__(rng, lookahead)
+        self.bag = list(PIECE_TYPES)
+    
+    def refill(self):
+        # Start from a fixed order so the bag only depends on the RNG state
+        bag = self.bag
+        bag[:] = PIECE_TYPES
+        self.rng.shuffle(bag)
+        self.queue.extend(bag)
+
+
+# Generators selectable by name (command line, recordings)
+GENERATORS = {
+    "uniform": UniformGenerator,
+    "bag": BagGenerator
+}
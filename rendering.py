@@ -0,0 +1,82 @@
+"""
+Rendering Helpers
+Caches for surfaces that are expensive to build every frame (rasterized HUD
+text, translucent overlays).
+"""
+
+from collections import OrderedDict
+
+import pygame
+
+
+class SurfaceCache:
+    """Surfaces keyed by their content, built on first use and reused after"""
+    
+    def __init__(self, max_entries=64):
+        self.max_entries = max_entries
+        self.surfaces = OrderedDict()
+    
+    def get(self, key, build):
+        """Get the surface for key, calling build() to create it on a miss"""
+        surface = self.surfaces.get(key)
+        if surface is None:
+            surface = build()
+            self.surfaces[key] = surface
+            # Drop the least recently used surface (old score text, etc.)
+            if len(self.surfaces) > self.max_entries:
+                self.surfaces.popitem(last=False)
+        else:
+            self.surfaces.move_to_end(key)
+        return surface
+    
+    def text(self, font, text, color):
+        """Get rendered antialiased text, rasterizing it only when it changes"""
+        return self.get(('text', font, text, color), lambda: font.render(text, True, color))
+    
+    def overlay(self, size, color, alpha):
+        """Get a solid translucent surface for dimming the screen"""
+        def build():
+            overlay = pygame.Surface(size)
+            overlay.set_alpha(alpha)
+            overlay.fill(color)
+            return overlay
+        return self.get(('overlay', size, color, alpha), build)
+    
+    def clear(self):
+        """Forget every cached surface"""
+        self.surfaces.clear()
+
+
+class TileAtlas:
+    """One surface holding a pre-rendered cell tile per palette color
+    
+    The top row has plain tiles, the bottom row has the white-bordered
+    variants used for previews. Tiles are drawn by blitting an area of
+    the atlas, so whole boards can go through a single Surface.blits call.
+    pixel_format is a surface whose format the atlas copies, for drawing
+    offscreen when there is no display to convert to.
+    """
+    
+    def __init__(self, palette, tile_size, border_color, border_width=2, pixel_format=None):
+        self.tile_size = tile_size
+        size = (tile_size * len(palette), tile_size * 2)
+        self.surface = pygame.Surface(size, 0, pixel_format) if pixel_format is not None else pygame.Surface(size)
+        self.tiles = []
+        self.preview_tiles = []
+        for index, color in enumerate(palette):
+            tile = pygame.Rect(index * tile_size, 0, tile_size, tile_size)
+            preview = pygame.Rect(index * tile_size, tile_size, tile_size, tile_size)
+            self.surface.fill(color, tile)
+            self.surface.fill(color, preview)
+            pygame.draw.rect(self.surface, border_color, preview, border_width)
+            self.tiles.append(tile)
+            self.preview_tiles.append(preview)
+        
+        # Match the display's pixel format so blits need no conversion
+        if pixel_format is None and pygame.display.get_surface() is not None:
+            self.surface = self.surface.convert()
+    
+    def blit_args(self, color_index, dest, preview=False):
+        """Get a (source, dest, area) entry for Surface.blits"""
+        area = self.preview_tiles[color_index] if preview else self.tiles[color_index]
+        return (self.surface, dest, area)
@@ -0,0 +1,343 @@
+"""
+Multiplayer / Spectator Server
+Hosts many headless games in one asyncio process, steps them all on a shared
+fixed tick and streams each game to its players and spectators as
+newline-delimited JSON over TCP. After a full state on joining, clients only
+get deltas: changed cells, the piece position and changed stats, and nothing
+at all on ticks where nothing moved.
+
+Usage:
+    python server.py --port 7777
+    python client.py --match demo --agent placement --render
+"""
+
+import argparse
+import asyncio
+import json
+import sys
+import time
+from itertools import chain
+
+from constants import TICK_DT, ACTION_PAUSE
+from engine import TetrisEngine
+
+PROTOCOL_VERSION = 1
+
+DEFAULT_PORT = 7777
+DEFAULT_MAX_MATCHES = 1000
+
+# Clients whose unsent output grows past this many bytes stop getting deltas
+# and are sent a full state once they catch up
+MAX_BUFFERED = 64 * 1024
+
+# Ticks the server may fall behind before it skips ahead instead of bursting
+MAX_TICK_LAG = 10
+
+# Longest message line accepted from a client (bytes); a client sending a
+# longer one gets an error and is disconnected
+MAX_LINE = 64 * 1024
+
+
+def encode(message):
+    """Serialize a message as one compact JSON line"""
+    return json.dumps(message, separators=(",", ":")).encode() + b"\n"
+
+
+class Match:
+    """One hosted game and the state its clients were last sent"""
+    
+    def __init__(self, match_id, seed=None):
+        self.match_id = match_id
+        self.engine = TetrisEngine(seed)
+        self.players = set()
+        self.spectators = set()
+        self.pending_actions = 0
+        self.remember()
+    
+    @property
+    def clients(self):
+        """Everyone watching the match, players included"""
+        return chain(self.players, self.spectators)
+    
+    def stats(self):
+        """Get the score, level, lines, pieces placed and game over flag"""
+        engine = self.engine
+        return engine.score, engine.level, engine.lines_cleared, engine.pieces_placed, engine.game_over
+    
+    def remember(self):
+        """Record the current state as what every client has seen"""
+        engine = self.engine
+        self.sent_colors = bytes(engine.board.colors)
+        self.sent_piece = engine.current_piece.state() if engine.current_piece else None
+        self.sent_next = engine.next_piece.shape_type if engine.next_piece else None
+        self.sent_stats = self.stats()
+    
+    def full_state(self):
+        """Get the whole game as a 'state' message"""
+        engine = self.engine
+        score, level, lines, pieces, game_over = self.stats()
+        return {
+            "type": "state",
+            "match": self.match_id,
+            "tick": engine.ticks,
+            "seed": engine.seed,
+            "width": engine.board.width,
+            "height": engine.board.height,
+            "cells": engine.board.colors.hex(),
+            "piece": engine.current_piece.state() if engine.current_piece else None,
+            "next": engine.next_piece.shape_type if engine.next_piece else None,
+            "score": score,
+            "level": level,
+            "lines": lines,
+            "pieces": pieces,
+            "game_over": game_over
+        }
+    
+    def delta(self):
+        """Get a 'delta' message with what changed since remember(), or None"""
+        engine = self.engine
+        message = {}
+        
+        # Locked cells only change when a piece locks or lines clear
+        colors = engine.board.colors
+        if colors != self.sent_colors:
+            sent = self.sent_colors
+            changed = []
+            for index in range(len(colors)):
+                if colors[index] != sent[index]:
+                    changed += (index, colors[index])
+            message["cells"] = changed
+            self.sent_colors = bytes(colors)
+        
+        piece = engine.current_piece.state() if engine.current_piece else None
+        if piece != self.sent_piece:
+            message["piece"] = piece
+            self.sent_piece = piece
+        
+        next_shape = engine.next_piece.shape_type if engine.next_piece else None
+        if next_shape != self.sent_next:
+            message["next"] = next_shape
+            self.sent_next = next_shape
+        
+        stats = self.stats()
+        if stats != self.sent_stats:
+            for key, old, new in zip(("score", "level", "lines", "pieces", "game_over"), self.sent_stats, stats):
+                if old != new:
+                    message[key] = new
+            self.sent_stats = stats
+        
+        if not message:
+            return None
+        message["type"] = "delta"
+        message["tick"] = engine.ticks
+        return message
+    
+    def step(self):
+        """Advance one tick with the inputs gathered since the last one; return the delta"""
+        if self.engine.game_over:
+            return None
+        # Matches run on the server clock, so nobody can pause them
+        self.engine.step(self.pending_actions & ~ACTION_PAUSE)
+        self.pending_actions = 0
+        return self.delta()
+
+
+class Connection:
+    """A connected client and the match it joined"""
+    
+    def __init__(self, writer):
+        self.writer = writer
+        self.match = None
+        self.role = None
+        self.needs_sync = False  # Skipped deltas; send a full state when possible
+    
+    def buffered(self):
+        """Bytes written to the socket but not yet sent"""
+        return self.writer.transport.get_write_buffer_size()
+
+
+class GameServer:
+    """Accepts clients, runs the tick loop and fans out state to every match's clients"""
+    
+    def __init__(self, max_matches=DEFAULT_MAX_MATCHES):
+        self.max_matches = max_matches
+        self.matches = {}
+        self.connections = set()
+        self.ticks = 0
+        self.bytes_sent = 0
+        self.messages_sent = 0
+    
+    def send(self, connection, data):
+        """Queue encoded data for one client without waiting for the socket"""
+        if connection.writer.is_closing():
+            return
+        connection.writer.write(data)
+        self.bytes_sent += len(data)
+        self.messages_sent += 1
+    
+    def broadcast(self, match, data):
+        """Send a delta to every client of a match, resyncing clients that fell behind"""
+        full = None
+        for connection in match.clients:
+            if connection.buffered() > MAX_BUFFERED:
+                connection.needs_sync = True
+            elif connection.needs_sync:
+                if full is None:
+                    full = encode(match.full_state())
+                self.send(connection, full)
+                connection.needs_sync = False
+            elif data is not None:
+                self.send(connection, data)
+    
+    def tick(self):
+        """Step every match once and stream the changes"""
+        for match in self.matches.values():
+            delta = match.step()
+            # Each delta is encoded once, however many clients watch the match
+            self.broadcast(match, encode(delta) if delta else None)
+        self.ticks += 1
+    
+    async def tick_loop(self):
+        """Run tick() at the fixed tick rate"""
+        loop = asyncio.get_running_loop()
+        next_tick = loop.time()
+        while True:
+            self.tick()
+            next_tick += TICK_DT
+            delay = next_tick - loop.time()
+            if delay < -MAX_TICK_LAG * TICK_DT:
+                # Too far behind to catch up smoothly: drop the missed ticks
+                next_tick = loop.time()
+                delay = 0
+            await asyncio.sleep(max(delay, 0))
+    
+    def join(self, connection, message):
+        """Put a client in a match as a player or spectator"""
+        self.leave(connection)
+        match_id = str(message["match"])
+        role = message.get("role", "player")
+        if role not in ("player", "spectator"):
+            raise ValueError(f"unknown role {role!r}")
+        
+        match = self.matches.get(match_id)
+        if match is None:
+            if role == "spectator":
+                raise ValueError(f"no match named {match_id!r}")
+            if len(self.matches) >= self.max_matches:
+                raise ValueError("server is full")
+            seed = message.get("seed")
+            match = self.matches[match_id] = Match(match_id, int(seed) if seed is not None else None)
+        
+        (match.players if role == "player" else match.spectators).add(connection)
+        connection.match = match
+        connection.role = role
+        connection.needs_sync = False
+        self.send(connection, encode(match.full_state()))
+    
+    def leave(self, connection):
+        """Take a client out of its match, closing the match when nobody is left"""
+        match = connection.match
+        if match is None:
+            return
+        match.players.discard(connection)
+        match.spectators.discard(connection)
+        connection.match = None
+        if not match.players and not match.spectators:
+            del self.matches[match.match_id]
+    
+    def handle_message(self, connection, message):
+        """Act on one message from a client"""
+        kind = message.get("type")
+        if kind == "join":
+            self.join(connection, message)
+        elif kind == "input":
+            if connection.role != "player":
+                raise ValueError("only players can send input")
+            connection.match.pending_actions |= int(message["actions"])
+        elif kind == "restart":
+            if connection.role != "player":
+                raise ValueError("only players can restart")
+            match = connection.match
+            seed = message.get("seed")
+            match.engine.reset(int(seed) if seed is not None else None)
+            match.pending_actions = 0
+            match.remember()
+            self.broadcast_state(match)
+        elif kind == "list":
+            self.send(connection, encode({"type": "matches", "matches": [
+                {"match": match.match_id, "players": len(match.players), "spectators": len(match.spectators),
+                 "tick": match.engine.ticks, "score": match.engine.score, "game_over": match.engine.game_over}
+                for match in self.matches.values()
+            ]}))
+        else:
+            raise ValueError(f"unknown message type {kind!r}")
+    
+    def broadcast_state(self, match):
+        """Send a full state to every client of a match"""
+        data = encode(match.full_state())
+        for connection in match.clients:
+            self.send(connection, data)
+    
+    async def handle_client(self, reader, writer):
+        """Serve one client connection until it closes"""
+        connection = Connection(writer)
+        self.connections.add(connection)
+        self.send(connection, encode({"type": "hello", "version": PROTOCOL_VERSION}))
+        try:
+            async for line in reader:
+                try:
+                    self.handle_message(connection, json.loads(line))
+                except (ValueError, KeyError, TypeError, AttributeError) as error:
+                    self.send(connection, encode({"type": "error", "message": str(error)}))
+        except ValueError:
+            # The stream reader raises ValueError for a line over MAX_LINE
+            self.send(connection, encode({"type": "error", "message": f"message longer than {MAX_LINE} bytes"}))
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            self.leave(connection)
+            self.connections.discard(connection)
+            writer.close()
+    
+    async def report(self, interval):
+        """Print load statistics every interval seconds"""
+        last_ticks, last_bytes, last_time = self.ticks, self.bytes_sent, time.perf_counter()
+        while True:
+            await asyncio.sleep(interval)
+            now = time.perf_counter()
+            elapsed = now - last_time
+            print(f"{len(self.matches)} matches, {len(self.connections)} clients, "
+                  f"{(self.ticks - last_ticks) / elapsed:.1f} ticks/s, "
+                  f"{(self.bytes_sent - last_bytes) / elapsed / 1024:.1f} KiB/s sent", file=sys.stderr)
+            last_ticks, last_bytes, last_time = self.ticks, self.bytes_sent, now
+    
+    async def serve(self, host, port, stats_interval=None):
+        """Listen for clients and run the tick loop forever"""
+        server = await asyncio.start_server(self.handle_client, host, port, limit=MAX_LINE)
+        tasks = [asyncio.create_task(self.tick_loop())]
+        if stats_interval:
+            tasks.append(asyncio.create_task(self.report(stats_interval)))
+        print(f"serving on {', '.join(str(sock.getsockname()) for sock in server.sockets)}", file=sys.stderr)
+        async with server:
+            await asyncio.gather(server.serve_forever(), *tasks)
+
+
+def main():
+    """Run the server"""
+    parser = argparse.ArgumentParser(description="Host headless Tetris matches for players and spectators")
+    parser.add_argument("--host", default="127.0.0.1", help="address to listen on")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT, help="TCP port to listen on")
+    parser.add_argument("--max-matches", type=int, default=DEFAULT_MAX_MATCHES,
+                        help="refuse new matches beyond this many")
+    parser.add_argument("--stats", type=float, metavar="SECONDS",
+                        help="print load statistics every SECONDS")
+    args = parser.parse_args()
+    
+    try:
+        asyncio.run(GameServer(args.max_matches).serve(args.host, args.port, args.stats))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
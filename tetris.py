@@ -3,380 +3,333 @@ Complete Tetris Game Implementation
 A fully functional Tetris game using Pygame with all standard features.
 """
 
+import time
+
+# Taken before Pygame is imported so startup measurements include it
+IMPORT_START = time.perf_counter()
+
+import argparse
+import os
 import pygame
-import random
 import sys
+from collections import deque
+from functools import cached_property
 
-# Initialize Pygame
-pygame.init()
+from constants import (
+    GRID_WIDTH, GRID_HEIGHT, BLACK, WHITE, GRAY, YELLOW, GREEN, RED, TICK_DT,
+    ACTION_LEFT, ACTION_RIGHT, ACTION_DOWN, ACTION_ROTATE, ACTION_PAUSE
+)
+from archive import GameArchive, GameLog, pack_game
+from board import COLOR_INDEX, PALETTE
+from controls import DEFAULT_ARR, DEFAULT_DAS, InputController
+from engine import TetrisEngine
+from pieces import PIECE_BOUNDS, PIECE_CELLS
+from profiler import FrameProfiler
+from randomizer import DEFAULT_LOOKAHEAD, GENERATORS
+from rendering import SurfaceCache, TileAtlas
+from replay import InputRecorder
 
-# Constants
-GRID_WIDTH = 10
-GRID_HEIGHT = 20
+# Layout constants
 CELL_SIZE = 30
 GRID_X_OFFSET = 50
 GRID_Y_OFFSET = 50
 
-# Window dimensions
+# Window dimensions for the default board (and the smallest window for any board)
 WINDOW_WIDTH = GRID_WIDTH * CELL_SIZE + GRID_X_OFFSET * 2 + 200  # Extra space for UI
 WINDOW_HEIGHT = GRID_HEIGHT * CELL_SIZE + GRID_Y_OFFSET * 2
 
-# Colors (RGB)
-BLACK = (0, 0, 0)
-WHITE = (255, 255, 255)
-GRAY = (128, 128, 128)
-CYAN = (0, 255, 255)      # I-piece
-YELLOW = (255, 255, 0)    # O-piece
-PURPLE = (128, 0, 128)    # T-piece
-GREEN = (0, 255, 0)       # S-piece
-RED = (255, 0, 0)         # Z-piece
-BLUE = (0, 0, 255)        # J-piece
-ORANGE = (255, 165, 0)    # L-piece
+# Largest area the board is drawn in: wider boards get smaller cells (down to
+# MIN_CELL_SIZE), taller ones scroll in a viewport that follows the piece
+MAX_GRID_PIXEL_WIDTH = 1000
+MAX_GRID_PIXEL_HEIGHT = GRID_HEIGHT * CELL_SIZE
+MIN_CELL_SIZE = 6
 
-# Game settings
+# Rows kept between the falling piece and the edge of a scrolling viewport
+VIEW_MARGIN = 4
+
+# Rendering settings
 FPS = 60
-FALL_SPEED = 0.5  # Seconds per cell
-FAST_FALL_SPEED = 0.05
-SCORE_PER_LINE = 100
-SCORE_MULTIPLIER = {1: 1, 2: 3, 3: 5, 4: 8}  # Bonus for multiple lines
+MAX_FRAME_TIME = 0.25  # Longest stall (seconds) simulated in fixed-tick mode
 
-# Tetromino shapes (relative coordinates)
-SHAPES = {
-    'I': [
-        [(0, 1), (1, 1), (2, 1), (3, 1)],
-        [(1, 0), (1, 1), (1, 2), (1, 3)],
-        [(0, 1), (1, 1), (2, 1), (3, 1)],
-        [(1, 0), (1, 1), (1, 2), (1, 3)]
-    ],
-    'O': [
-        [(0, 0), (1, 0), (0, 1), (1, 1)],
-        [(0, 0), (1, 0), (0, 1), (1, 1)],
-        [(0, 0), (1, 0), (0, 1), (1, 1)],
-        [(0, 0), (1, 0), (0, 1), (1, 1)]
-    ],
-    'T': [
-        [(1, 0), (0, 1), (1, 1), (2, 1)],
-        [(1, 0), (1, 1), (2, 1), (1, 2)],
-        [(0, 1), (1, 1), (2, 1), (1, 2)],
-        [(1, 0), (0, 1), (1, 1), (1, 2)]
-    ],
-    'S': [
-        [(1, 0), (2, 0), (0, 1), (1, 1)],
-        [(1, 0), (1, 1), (2, 1), (2, 2)],
-        [(1, 0), (2, 0), (0, 1), (1, 1)],
-        [(1, 0), (1, 1), (2, 1), (2, 2)]
-    ],
-    'Z': [
-        [(0, 0), (1, 0), (1, 1), (2, 1)],
-        [(2, 0), (1, 1), (2, 1), (1, 2)],
-        [(0, 0), (1, 0), (1, 1), (2, 1)],
-        [(2, 0), (1, 1), (2, 1), (1, 2)]
-    ],
-    'J': [
-        [(0, 0), (0, 1), (1, 1), (2, 1)],
-        [(1, 0), (2, 0), (1, 1), (1, 2)],
-        [(0, 1), (1, 1), (2, 1), (2, 2)],
-        [(1, 0), (1, 1), (0, 2), (1, 2)]
-    ],
-    'L': [
-        [(2, 0), (0, 1), (1, 1), (2, 1)],
-        [(1, 0), (1, 1), (1, 2), (2, 2)],
-        [(0, 1), (1, 1), (2, 1), (0, 2)],
-        [(0, 0), (1, 0), (1, 1), (1, 2)]
-    ]
-}
+# Frame rates in power-save mode while the window is in the background
+UNFOCUSED_FPS = 15
+MINIMIZED_FPS = 5
 
-# Color mapping for each piece type
-PIECE_COLORS = {
-    'I': CYAN,
-    'O': YELLOW,
-    'T': PURPLE,
-    'S': GREEN,
-    'Z': RED,
-    'J': BLUE,
-    'L': ORANGE
+# Window events after which the whole window has to be drawn again
+REPAINT_EVENTS = (pygame.VIDEOEXPOSE, pygame.WINDOWEXPOSED, pygame.WINDOWRESTORED, pygame.WINDOWFOCUSGAINED)
+
+# Pieces that can be taken back in practice mode
+UNDO_LIMIT = 100
+
+# Keys that drive the game (the rest are handled in TetrisGame.run)
+KEY_ACTIONS = {
+    pygame.K_LEFT: ACTION_LEFT,
+    pygame.K_RIGHT: ACTION_RIGHT,
+    pygame.K_DOWN: ACTION_DOWN,
+    pygame.K_UP: ACTION_ROTATE,
+    pygame.K_SPACE: ACTION_ROTATE,
+    pygame.K_p: ACTION_PAUSE
 }
 
 
-class Tetromino:
-    """Represents a Tetris piece (tetromino)"""
-    
-    def __init__(self, shape_type, x=GRID_WIDTH // 2 - 1, y=0):
-        self.shape_type = shape_type
-        self.x = x
-        self.y = y
-        self.rotation = 0
-        self.shape = SHAPES[shape_type]
-        self.color = PIECE_COLORS[shape_type]
-    
-    def get_cells(self):
-        """Get the absolute coordinates of all cells in the current piece"""
-        cells = []
-        for dx, dy in self.shape[self.rotation]:
-            cells.append((self.x + dx, self.y + dy))
-        return cells
-    
-    def rotate(self):
-        """Rotate the piece clockwise"""
-        self.rotation = (self.rotation + 1) % 4
-    
-    def get_rotated_cells(self):
-        """Get cells if rotated (for collision checking)"""
-        next_rotation = (self.rotation + 1) % 4
-        cells = []
-        for dx, dy in self.shape[next_rotation]:
-            cells.append((self.x + dx, self.y + dy))
-        return cells
+def init_pygame():
+    """Start only the Pygame subsystems the game uses (no audio or joystick probing)"""
+    pygame.display.init()
+    pygame.font.init()
+
+
+def lazy_font(size):
+    """A TetrisGame attribute holding the default font at size, loaded on first use"""
+    return cached_property(lambda self: pygame.font.Font(None, size))
 
 
 class TetrisGame:
-    """Main game class handling all game logic"""
+    """Pygame front end: renders a TetrisEngine and feeds it keyboard input
     
-    def __init__(self):
-        self.screen = pygame.display.set_mode((WINDOW_WIDTH, WINDOW_HEIGHT))
-        pygame.display.set_caption("Tetris")
-        self.clock = pygame.time.Clock()
-        self.font = pygame.font.Font(None, 36)
-        self.small_font = pygame.font.Font(None, 24)
-        self.large_font = pygame.font.Font(None, 48)
-        self.title_font = pygame.font.Font(None, 72)
-        
-        # Game state
-        self.grid = [[BLACK for _ in range(GRID_WIDTH)] for _ in range(GRID_HEIGHT)]
-        self.current_piece = None
-        self.next_piece = None
-        self.score = 0
-        self.level = 1
-        self.lines_cleared = 0
-        self.game_over = False
-        self.paused = False
-        self.fall_timer = 0
-        self.fall_speed = FALL_SPEED
-        
-        # Initialize first pieces
-        self.spawn_piece()
-        self.next_piece = self.create_random_piece()
-    
-    def create_random_piece(self):
-        """Create a random tetromino"""
-        shape_type = random.choice(list(SHAPES.keys()))
-        return Tetromino(shape_type)
-    
-    def spawn_piece(self):
-        """Spawn a new piece at the top"""
-        if self.next_piece:
-            self.current_piece = self.next_piece
-            self.current_piece.x = GRID_WIDTH // 2 - 1
-            self.current_piece.y = 0
-        else:
-            self.current_piece = self.create_random_piece()
-        
-        self.next_piece = self.create_random_piece()
-        
-        # Check for game over
-        if self.check_collision(self.current_piece):
-            self.game_over = True
+    The window is opened by run() (or an explicit open_display() call before
+    drawing), so building a game does no SDL work. open_offscreen() draws
+    into a plain surface instead, with no window or display at all.
+    """
     
-    def check_collision(self, piece, dx=0, dy=0):
-        """Check if piece collides with walls or other pieces"""
-        cells = piece.get_cells()
-        for x, y in cells:
-            new_x, new_y = x + dx, y + dy
-            
-            # Check walls
-            if new_x < 0 or new_x >= GRID_WIDTH or new_y >= GRID_HEIGHT:
-                return True
-            
-            # Check other pieces (only check if below top)
-            if new_y >= 0 and self.grid[new_y][new_x] != BLACK:
-                return True
-        
-        return False
-    
-    def check_rotation_collision(self, piece):
-        """Check if rotation would cause collision"""
-        cells = piece.get_rotated_cells()
-        for x, y in cells:
-            # Check walls
-            if x < 0 or x >= GRID_WIDTH or y >= GRID_HEIGHT:
-                return True
-            
-            # Check other pieces
-            if y >= 0 and self.grid[y][x] != BLACK:
-                return True
-        
-        return False
+    font = lazy_font(36)
+    small_font = lazy_font(24)
+    large_font = lazy_font(48)
+    title_font = lazy_font(72)
     
-    def lock_piece(self):
-        """Lock the current piece into the grid"""
-        cells = self.current_piece.get_cells()
-        for x, y in cells:
-            if y >= 0:  # Only lock if piece is on the grid
-                self.grid[y][x] = self.current_piece.color
-        
-        # Check for full lines
-        self.clear_lines()
+    def __init__(self, dirty_rects=False, engine=None, fixed_tick=False, seed=None, record_dir=None,
+                 autoplay=False, profile_path=None, practice=False, power_save=False,
+                 randomizer="uniform", preview=1, width=GRID_WIDTH, height=GRID_HEIGHT, archive_path=None,
+                 das=DEFAULT_DAS, arr=DEFAULT_ARR):
+        self.screen = None  # Created by open_display() or open_offscreen()
+        self.offscreen = False  # Drawing into a surface that is never shown
+        self.clock = pygame.time.Clock()
         
-        # Spawn next piece
-        self.spawn_piece()
+        # Rendered HUD text and overlays, keyed by their content
+        self.surfaces = SurfaceCache()
+        
+        # Cell tiles for every palette color, drawn in batched blits
+        self.tiles = None  # Built with the window, in the display's pixel format
+        self.preview_tiles = None  # Full-size tiles for the next piece box
+        self.upcoming_tiles = None  # Half-size tiles for the pieces after it
+        self.cell_blits = []
+        
+        # Game logic lives in the headless engine; this class renders it
+        # and translates keyboard input into engine actions
+        self.engine = engine if engine is not None else TetrisEngine(seed, randomizer, width=width, height=height)
+        self.preview = preview  # Upcoming pieces shown, next piece included
+        
+        # Layout for the engine's board size, and the first board row shown
+        board = self.engine.board
+        self.cell_size = max(MIN_CELL_SIZE, min(CELL_SIZE, MAX_GRID_PIXEL_WIDTH // board.width))
+        self.view_rows = min(board.height, MAX_GRID_PIXEL_HEIGHT // self.cell_size)
+        self.view_top = 0
+        self.grid_pixel_width = board.width * self.cell_size
+        self.window_width = max(WINDOW_WIDTH, self.grid_pixel_width + GRID_X_OFFSET * 2 + 200)
+        self.window_height = max(WINDOW_HEIGHT, self.view_rows * self.cell_size + GRID_Y_OFFSET * 2)
+        self.hud_x = GRID_X_OFFSET + self.grid_pixel_width + 20
+        
+        # Key presses and releases, turned into actions with DAS/ARR auto repeat
+        self.controls = InputController(KEY_ACTIONS, das, arr)
+        
+        # Fixed-timestep mode: the engine advances in TICK_DT steps so a
+        # game is fully determined by its seed and per-tick inputs (archived
+        # games need it too, for the tick every piece locked on)
+        self.fixed_tick = fixed_tick or record_dir is not None or archive_path is not None
+        self.accumulator = 0.0
+        self.record_dir = record_dir
+        self.recorder = self.new_recorder() if record_dir else None
+        
+        # Every game's placements and line clears, appended to a GameArchive
+        # when it is restarted or the window closes
+        self.archive = GameArchive(archive_path) if archive_path else None
+        if self.archive is not None:
+            self.engine.log = GameLog()
+        
+        # Built-in bot that plays instead of the keyboard (imported only when used)
+        self.autoplayer = None
+        if autoplay:
+            from ai import PlacementAgent
+            self.autoplayer = PlacementAgent()
+            self.autoplayer.reset(self.engine)
+        
+        # Practice mode: a snapshot at every piece spawn, so U can take a piece back
+        self.undo_history = deque(maxlen=UNDO_LIMIT) if practice else None
+        self.track_undo()
+        
+        # Per-phase frame timers; created on demand by F3 unless exporting
+        self.profile_path = profile_path
+        self.profiler = FrameProfiler(FPS, keep_trace=True) if profile_path else None
+        
+        # Power-save mode: sleep until an event while nothing can change,
+        # and slow down while the window is in the background
+        self.power_save = power_save
+        self.focused = True
+        self.minimized = False
+        self.repaint = True  # Draw the next frame even if the game looks idle
+        
+        # Dirty-rectangle rendering: repaint and push only what changed
+        self.dirty_rects = dirty_rects
+        self.background = None  # Pre-rendered board frame and grid lines
+        self.hud_rect = pygame.Rect(
+            GRID_X_OFFSET + self.grid_pixel_width + 1,
+            0,
+            self.window_width - (GRID_X_OFFSET + self.grid_pixel_width + 1),
+            self.window_height
+        )
+        self.drawn_cells = None  # Palette indices shown on screen last frame
+        self.drawn_view_top = None
+        self.drawn_hud_state = None
+        self.drawn_overlay_state = None
     
-    def clear_lines(self):
-        """Clear full horizontal lines and update score"""
-        lines_to_clear = []
-        
-        # Find full lines (check from bottom to top for proper indexing)
-        for y in range(GRID_HEIGHT - 1, -1, -1):
-            if all(cell != BLACK for cell in self.grid[y]):
-                lines_to_clear.append(y)
-        
-        # If no lines to clear, return early
-        if not lines_to_clear:
+    def open_display(self):
+        """Initialize Pygame and create the window (once)"""
+        if self.screen is not None:
             return
-        
-        # Build new grid without full rows
-        # Keep only rows that are not full
-        new_grid = []
-        for y in range(GRID_HEIGHT):
-            if y not in lines_to_clear:
-                new_grid.append(self.grid[y])
-        
-        # Add empty rows at the top to maintain grid height
-        num_cleared = len(lines_to_clear)
-        for _ in range(num_cleared):
-            new_grid.insert(0, [BLACK for _ in range(GRID_WIDTH)])
-        
-        # Replace the grid
-        self.grid = new_grid
-        
-        # Update score
-        num_lines = num_cleared
-        self.lines_cleared += num_lines
-        multiplier = SCORE_MULTIPLIER.get(num_lines, num_lines * 2)
-        self.score += SCORE_PER_LINE * multiplier * self.level
-        
-        # Level up every 10 lines
-        self.level = (self.lines_cleared // 10) + 1
-        self.fall_speed = max(0.05, FALL_SPEED - (self.level - 1) * 0.05)
-    
-    def move_piece(self, dx, dy):
-        """Move the current piece"""
-        if not self.check_collision(self.current_piece, dx, dy):
-            self.current_piece.x += dx
-            self.current_piece.y += dy
-            return True
-        return False
-    
-    def rotate_piece(self):
-        """Rotate the current piece"""
-        if not self.check_rotation_collision(self.current_piece):
-            self.current_piece.rotate()
+        init_pygame()
+        self.screen = pygame.display.set_mode((self.window_width, self.window_height))
+        pygame.display.set_caption("Tetris")
+        self.build_tiles()
+    
+    def open_offscreen(self, surface=None):
+        """Draw into surface (by default a new window-sized one) instead of a window
+        
+        Only fonts are initialized. draw() then skips the display flip, and
+        screen may be swapped for another surface of the same format between
+        frames.
+        """
+        pygame.font.init()
+        if surface is None:
+            surface = pygame.Surface((self.window_width, self.window_height))
+        self.screen = surface
+        self.offscreen = True
+        self.build_tiles(surface)
+    
+    def build_tiles(self, pixel_format=None):
+        """Build the cell tiles for the board's cell size (and full- and half-size preview tiles)"""
+        self.tiles = TileAtlas(PALETTE, self.cell_size - 2, WHITE, pixel_format=pixel_format)
+        if self.cell_size == CELL_SIZE:
+            self.preview_tiles = self.tiles
         else:
-            # Try wall kicks (shift left/right if rotation hits wall)
-            for dx in [-1, 1, -2, 2]:
-                self.current_piece.x += dx
-                if not self.check_rotation_collision(self.current_piece):
-                    self.current_piece.rotate()
-                    return
-                self.current_piece.x -= dx  # Revert if wall kick doesn't work
-    
-    def update(self, dt):
-        """Update game state"""
-        if self.game_over or self.paused:
-            return
-        
-        # Update fall timer
-        self.fall_timer += dt
-        
-        # Check if piece should fall
-        if self.fall_timer >= self.fall_speed:
-            self.fall_timer = 0
-            if not self.move_piece(0, 1):
-                self.lock_piece()
+            self.preview_tiles = TileAtlas(PALETTE, CELL_SIZE - 2, WHITE, pixel_format=pixel_format)
+        self.upcoming_tiles = TileAtlas(PALETTE, CELL_SIZE // 2 - 1, WHITE, pixel_format=pixel_format)
     
-    def handle_input(self, keys):
-        """Handle keyboard input"""
-        if self.game_over:
-            return
+    def autoplay_actions(self, actions):
+        """Replace the player's moves with the autoplayer's (pause still works)"""
+        engine = self.engine
+        if self.autoplayer is None or engine.paused or engine.game_over:
+            return actions
+        return (actions & ACTION_PAUSE) | self.autoplayer.act(engine)
+    
+    def handle_input(self, now):
+        """Apply the keyboard's actions for a frame at time now (variable-timestep mode)"""
+        self.engine.apply_actions(self.autoplay_actions(self.controls.actions(now)))
+    
+    def step(self, actions):
+        """Run one fixed tick, recording its input when a recorder is attached"""
+        actions = self.autoplay_actions(actions)
+        if self.recorder:
+            self.recorder.record(actions)
+        self.engine.step(actions)
+    
+    def new_recorder(self):
+        """Start recording the current game"""
+        engine = self.engine
+        return InputRecorder(engine.seed, engine.randomizer, engine.board.width, engine.board.height)
+    
+    def save_recording(self):
+        """Write the current game's input recording, if recording"""
+        if self.recorder and self.recorder.ticks:
+            self.recorder.finish(self.engine)
+            self.recorder.save(os.path.join(self.record_dir, f"tetris-{self.engine.seed}.json"))
+    
+    def archive_game(self):
+        """Append the current game to the archive, if archiving and a piece was placed"""
+        if self.archive is not None and self.engine.pieces_placed:
+            self.archive.append(pack_game(self.engine, self.engine.log))
+    
+    def draw_grid_lines(self, surface):
+        """Draw the empty grid background and grid lines of the viewport onto a surface"""
+        cell_size = self.cell_size
+        grid_height = self.view_rows * cell_size
+        grid_rect = pygame.Rect(
+            GRID_X_OFFSET,
+            GRID_Y_OFFSET,
+            self.grid_pixel_width,
+            grid_height
+        )
+        pygame.draw.rect(surface, BLACK, grid_rect)
         
-        # Pause toggle
-        if keys[pygame.K_p]:
-            self.paused = not self.paused
+        for x in range(self.engine.board.width + 1):
+            start_pos = (GRID_X_OFFSET + x * cell_size, GRID_Y_OFFSET)
+            end_pos = (GRID_X_OFFSET + x * cell_size, GRID_Y_OFFSET + grid_height)
+            pygame.draw.line(surface, GRAY, start_pos, end_pos, 1)
         
-        if self.paused:
+        for y in range(self.view_rows + 1):
+            start_pos = (GRID_X_OFFSET, GRID_Y_OFFSET + y * cell_size)
+            end_pos = (GRID_X_OFFSET + self.grid_pixel_width, GRID_Y_OFFSET + y * cell_size)
+            pygame.draw.line(surface, GRAY, start_pos, end_pos, 1)
+    
+    def draw_cell(self, x, row, color_index, preview=False):
+        """Queue one filled cell at column x, row rows below the top of the viewport (drawn by flush_cells)"""
+        dest = (GRID_X_OFFSET + x * self.cell_size + 1, GRID_Y_OFFSET + row * self.cell_size + 1)
+        self.cell_blits.append(self.tiles.blit_args(color_index, dest, preview))
+    
+    def flush_cells(self):
+        """Draw every queued cell in one batched blit"""
+        if self.cell_blits:
+            self.screen.blits(self.cell_blits, doreturn=False)
+            self.cell_blits.clear()
+    
+    def scroll_viewport(self):
+        """Scroll a board taller than the viewport to the falling piece and the stack under it"""
+        engine = self.engine
+        height = engine.board.height
+        rows = self.view_rows
+        piece = engine.current_piece
+        if height <= rows or piece is None or engine.game_over:
             return
         
-        # Movement
-        if keys[pygame.K_LEFT]:
-            self.move_piece(-1, 0)
-        if keys[pygame.K_RIGHT]:
-            self.move_piece(1, 0)
-        if keys[pygame.K_DOWN]:
-            if self.move_piece(0, 1):
-                self.fall_timer = 0  # Reset timer for faster fall
-        
-        # Rotation
-        if keys[pygame.K_UP] or keys[pygame.K_SPACE]:
-            self.rotate_piece()
+        # Show the stack surface VIEW_MARGIN rows above the bottom edge unless
+        # that would hide the piece; then follow the piece with VIEW_MARGIN
+        # rows above it (and never cut off its bottom)
+        _, min_dy, _, max_dy = PIECE_BOUNDS[piece.shape_type][piece.rotation]
+        top = min(piece.y + min_dy - VIEW_MARGIN, engine.board.stack_top + VIEW_MARGIN - rows)
+        top = max(top, piece.y + max_dy + VIEW_MARGIN + 1 - rows)
+        self.view_top = max(0, min(top, height - rows))
     
     def draw_grid(self):
         """Draw the game grid"""
-        # Draw grid background
-        grid_rect = pygame.Rect(
-            GRID_X_OFFSET,
-            GRID_Y_OFFSET,
-            GRID_WIDTH * CELL_SIZE,
-            GRID_HEIGHT * CELL_SIZE
-        )
-        pygame.draw.rect(self.screen, BLACK, grid_rect)
-        
-        # Draw grid lines
-        for x in range(GRID_WIDTH + 1):
-            start_pos = (GRID_X_OFFSET + x * CELL_SIZE, GRID_Y_OFFSET)
-            end_pos = (GRID_X_OFFSET + x * CELL_SIZE, GRID_Y_OFFSET + GRID_HEIGHT * CELL_SIZE)
-            pygame.draw.line(self.screen, GRAY, start_pos, end_pos, 1)
-        
-        for y in range(GRID_HEIGHT + 1):
-            start_pos = (GRID_X_OFFSET, GRID_Y_OFFSET + y * CELL_SIZE)
-            end_pos = (GRID_X_OFFSET + GRID_WIDTH * CELL_SIZE, GRID_Y_OFFSET + y * CELL_SIZE)
-            pygame.draw.line(self.screen, GRAY, start_pos, end_pos, 1)
-        
-        # Draw locked pieces
-        for y in range(GRID_HEIGHT):
-            for x in range(GRID_WIDTH):
-                if self.grid[y][x] != BLACK:
-                    rect = pygame.Rect(
-                        GRID_X_OFFSET + x * CELL_SIZE + 1,
-                        GRID_Y_OFFSET + y * CELL_SIZE + 1,
-                        CELL_SIZE - 2,
-                        CELL_SIZE - 2
-                    )
-                    pygame.draw.rect(self.screen, self.grid[y][x], rect)
+        # Draw grid background and lines
+        self.draw_grid_lines(self.screen)
+        
+        # Draw locked pieces in the viewport (skipping empty rows entirely,
+        # and never visiting the rows above the stack)
+        board = self.engine.board
+        width = board.width
+        top = self.view_top
+        for y in range(max(top, board.stack_top), top + self.view_rows):
+            if not board.rows[y]:
+                continue
+            for x in range(width):
+                color_index = board.colors[y * width + x]
+                if color_index:
+                    self.draw_cell(x, y - top, color_index)
     
     def draw_piece(self, piece, offset_x=0, offset_y=0, preview=False):
-        """Draw a tetromino piece"""
-        cells = piece.get_cells()
-        for x, y in cells:
-            # Calculate screen position
-            screen_x = GRID_X_OFFSET + (x + offset_x) * CELL_SIZE + 1
-            screen_y = GRID_Y_OFFSET + (y + offset_y) * CELL_SIZE + 1
+        """Queue a tetromino piece (drawn by flush_cells)"""
+        for dx, dy in piece.cells[piece.rotation]:
+            row = piece.y + dy - self.view_top
             
             # Only draw if on screen
-            if 0 <= y < GRID_HEIGHT:
-                rect = pygame.Rect(screen_x, screen_y, CELL_SIZE - 2, CELL_SIZE - 2)
-                color = piece.color
-                if preview:
-                    # Make preview slightly transparent
-                    pygame.draw.rect(self.screen, color, rect)
-                    pygame.draw.rect(self.screen, WHITE, rect, 2)
-                else:
-                    pygame.draw.rect(self.screen, color, rect)
+            if 0 <= row < self.view_rows:
+                self.draw_cell(piece.x + dx + offset_x, row + offset_y, piece.color_index, preview)
     
     def draw_next_piece(self):
         """Draw the next piece preview in its own dedicated area"""
-        if not self.next_piece:
+        if not self.engine.next_piece:
             return
         
-        preview_x = GRID_X_OFFSET + GRID_WIDTH * CELL_SIZE + 20
+        preview_x = self.hud_x
         preview_y = GRID_Y_OFFSET + 250  # Positioned well below level text and score panel
         
         # Draw preview box background
@@ -387,19 +340,13 @@ class TetrisGame:
         pygame.draw.rect(self.screen, WHITE, box_rect, 2)  # White border
         
         # Draw "Next:" label above the box
-        label = self.font.render("Next:", True, WHITE)
+        label = self.surfaces.text(self.font, "Next:", WHITE)
         label_y = preview_y - 80
         self.screen.blit(label, (preview_x, label_y))
         
-        # Calculate piece bounds for centering
-        preview_cells = self.next_piece.shape[0]
-        if not preview_cells:
-            return
-        
-        min_x = min(x for x, y in preview_cells)
-        max_x = max(x for x, y in preview_cells)
-        min_y = min(y for x, y in preview_cells)
-        max_y = max(y for x, y in preview_cells)
+        # Look up piece bounds for centering
+        preview_cells = self.engine.next_piece.cells[0]
+        min_x, min_y, max_x, max_y = PIECE_BOUNDS[self.engine.next_piece.shape_type][0]
         
         # Calculate center of the piece shape
         center_x = (min_x + max_x) / 2.0
@@ -409,7 +356,8 @@ class TetrisGame:
         box_center_x = preview_x + box_width // 2 - CELL_SIZE // 2
         box_center_y = preview_y + 10
         
-        # Draw each cell of the next piece
+        # Draw each cell of the next piece with its bordered preview tile
+        color_index = self.engine.next_piece.color_index
         for dx, dy in preview_cells:
             # Calculate position relative to center
             cell_x = box_center_x + (dx - center_x) * CELL_SIZE
@@ -418,54 +366,53 @@ class TetrisGame:
             # Ensure piece stays within preview box bounds
             if (preview_x - 10 <= cell_x <= preview_x - 10 + box_width and
                 preview_y - 50 <= cell_y <= preview_y - 50 + box_height):
-                rect = pygame.Rect(cell_x + 1, cell_y + 1, CELL_SIZE - 2, CELL_SIZE - 2)
-                pygame.draw.rect(self.screen, self.next_piece.color, rect)
-                pygame.draw.rect(self.screen, WHITE, rect, 2)
+                dest = (int(cell_x + 1), int(cell_y + 1))
+                self.cell_blits.append(self.preview_tiles.blit_args(color_index, dest, preview=True))
+        self.flush_cells()
     
     def draw_game_over_screen(self):
         """Draw game over overlay with semi-transparent background and centered panel"""
-        # Create semi-transparent overlay
-        overlay = pygame.Surface((WINDOW_WIDTH, WINDOW_HEIGHT))
-        overlay.set_alpha(200)
-        overlay.fill(BLACK)
+        # Semi-transparent overlay (built once, reused every frame)
+        overlay = self.surfaces.overlay((self.window_width, self.window_height), BLACK, 200)
         self.screen.blit(overlay, (0, 0))
         
         # Draw game over panel background
         panel_width = 450
         panel_height = 320
-        panel_x = (WINDOW_WIDTH - panel_width) // 2
-        panel_y = (WINDOW_HEIGHT - panel_height) // 2
+        center_x = self.window_width // 2
+        panel_x = center_x - panel_width // 2
+        panel_y = (self.window_height - panel_height) // 2
         panel_rect = pygame.Rect(panel_x, panel_y, panel_width, panel_height)
         pygame.draw.rect(self.screen, (30, 30, 30), panel_rect)
         pygame.draw.rect(self.screen, WHITE, panel_rect, 3)
         
         # Draw "GAME OVER" title
-        game_over_text = self.title_font.render("GAME OVER", True, RED)
-        title_rect = game_over_text.get_rect(center=(WINDOW_WIDTH // 2, panel_y + 70))
+        game_over_text = self.surfaces.text(self.title_font, "GAME OVER", RED)
+        title_rect = game_over_text.get_rect(center=(center_x, panel_y + 70))
         self.screen.blit(game_over_text, title_rect)
         
         # Draw final score
-        score_text = self.font.render(f"Final Score: {self.score}", True, WHITE)
-        score_rect = score_text.get_rect(center=(WINDOW_WIDTH // 2, panel_y + 140))
+        score_text = self.surfaces.text(self.font, f"Final Score: {self.engine.score}", WHITE)
+        score_rect = score_text.get_rect(center=(center_x, panel_y + 140))
         self.screen.blit(score_text, score_rect)
         
         # Draw level reached
-        level_text = self.font.render(f"Level Reached: {self.level}", True, WHITE)
-        level_rect = level_text.get_rect(center=(WINDOW_WIDTH // 2, panel_y + 180))
+        level_text = self.surfaces.text(self.font, f"Level Reached: {self.engine.level}", WHITE)
+        level_rect = level_text.get_rect(center=(center_x, panel_y + 180))
         self.screen.blit(level_text, level_rect)
         
         # Draw instructions with larger, colored fonts
-        restart_text = self.large_font.render("Press R to Restart", True, GREEN)
-        restart_rect = restart_text.get_rect(center=(WINDOW_WIDTH // 2, panel_y + 230))
+        restart_text = self.surfaces.text(self.large_font, "Press R to Restart", GREEN)
+        restart_rect = restart_text.get_rect(center=(center_x, panel_y + 230))
         self.screen.blit(restart_text, restart_rect)
         
-        quit_text = self.large_font.render("Press Q to Quit", True, RED)
-        quit_rect = quit_text.get_rect(center=(WINDOW_WIDTH // 2, panel_y + 280))
+        quit_text = self.surfaces.text(self.large_font, "Press Q to Quit", RED)
+        quit_rect = quit_text.get_rect(center=(center_x, panel_y + 280))
         self.screen.blit(quit_text, quit_rect)
     
-    def draw_ui(self):
-        """Draw UI elements (score, level, etc.) with proper spacing"""
-        ui_x = GRID_X_OFFSET + GRID_WIDTH * CELL_SIZE + 20
+    def draw_hud(self):
+        """Draw the score panel and next piece preview"""
+        ui_x = self.hud_x
         ui_y = GRID_Y_OFFSET
         
         # Draw UI panel background for score/level section
@@ -476,118 +423,453 @@ class TetrisGame:
         pygame.draw.rect(self.screen, WHITE, panel_rect, 2)  # White border
         
         # Score (at top of UI panel)
-        score_text = self.font.render(f"Score: {self.score}", True, WHITE)
+        score_text = self.surfaces.text(self.font, f"Score: {self.engine.score}", WHITE)
         self.screen.blit(score_text, (ui_x, ui_y))
         
         # Level (clearly separated below score)
-        level_text = self.font.render(f"Level: {self.level}", True, WHITE)
+        level_text = self.surfaces.text(self.font, f"Level: {self.engine.level}", WHITE)
         self.screen.blit(level_text, (ui_x, ui_y + 40))
         
         # Lines cleared (below level, before next piece area)
-        lines_text = self.small_font.render(f"Lines: {self.lines_cleared}", True, WHITE)
+        lines_text = self.surfaces.text(self.small_font, f"Lines: {self.engine.lines_cleared}", WHITE)
         self.screen.blit(lines_text, (ui_x, ui_y + 80))
         
         # Draw next piece preview (positioned well below level text)
         self.draw_next_piece()
         
+        # Smaller previews of the pieces after that
+        bottom = self.draw_upcoming(ui_x - 10, GRID_Y_OFFSET + 335)
+        
+        # Frame profiler stats below the previews
+        if self.profiler and self.profiler.show_overlay:
+            self.draw_profiler_overlay(ui_x - 10, bottom + 5)
+    
+    def draw_upcoming(self, x, y):
+        """Draw the pieces after the next one at half size, three to a row; return the bottom"""
+        shapes = self.engine.upcoming(self.preview)[1:]
+        size = CELL_SIZE // 2
+        for i, shape_type in enumerate(shapes):
+            left = x + (i % 3) * (4 * size + 10)
+            top = y + (i // 3) * (2 * size + 10)
+            min_x, min_y, _, _ = PIECE_BOUNDS[shape_type][0]
+            color_index = COLOR_INDEX[shape_type]
+            for dx, dy in PIECE_CELLS[shape_type][0]:
+                dest = (left + (dx - min_x) * size, top + (dy - min_y) * size)
+                self.cell_blits.append(self.upcoming_tiles.blit_args(color_index, dest))
+        self.flush_cells()
+        rows = (len(shapes) + 2) // 3
+        return y + rows * (2 * size + 10)
+    
+    def draw_profiler_overlay(self, x, y):
+        """Draw the frame profiler's debug text"""
+        for line in self.profiler.overlay_lines:
+            text = self.surfaces.text(self.small_font, line, GREEN)
+            self.screen.blit(text, (x, y))
+            y += 22
+    
+    def draw_ui(self):
+        """Draw UI elements (score, level, etc.) with proper spacing"""
+        self.draw_hud()
+        
         # Pause message with overlay
-        if self.paused:
+        if self.engine.paused:
             # Semi-transparent overlay
-            overlay = pygame.Surface((WINDOW_WIDTH, WINDOW_HEIGHT))
-            overlay.set_alpha(150)
-            overlay.fill(BLACK)
+            overlay = self.surfaces.overlay((self.window_width, self.window_height), BLACK, 150)
             self.screen.blit(overlay, (0, 0))
             
-            pause_text = self.large_font.render("PAUSED", True, YELLOW)
-            text_rect = pause_text.get_rect(center=(WINDOW_WIDTH // 2, WINDOW_HEIGHT // 2))
+            pause_text = self.surfaces.text(self.large_font, "PAUSED", YELLOW)
+            text_rect = pause_text.get_rect(center=(self.window_width // 2, self.window_height // 2))
             self.screen.blit(pause_text, text_rect)
         
         # Game over screen (drawn last to be on top)
-        if self.game_over:
+        if self.engine.game_over:
             self.draw_game_over_screen()
     
     def draw(self):
         """Draw everything"""
+        profiler = self.profiler
+        self.scroll_viewport()
         self.screen.fill(BLACK)
         self.draw_grid()
         
-        if self.current_piece and not self.game_over:
-            self.draw_piece(self.current_piece)
+        if self.engine.current_piece and not self.engine.game_over:
+            self.draw_piece(self.engine.current_piece)
+        
+        # Locked cells and the falling piece go out in one batch
+        self.flush_cells()
+        if profiler:
+            profiler.mark("grid")
         
         self.draw_ui()
-        pygame.display.flip()
+        if profiler:
+            profiler.mark("ui")
+        if not self.offscreen:
+            pygame.display.flip()
+        if profiler:
+            profiler.mark("flip")
+    
+    def build_background(self):
+        """Pre-render the static board frame and grid lines"""
+        background = pygame.Surface((self.window_width, self.window_height))
+        background.fill(BLACK)
+        self.draw_grid_lines(background)
+        return background.convert()
+    
+    def compose_cells(self):
+        """Get the palette indices of the viewport's rows with the falling piece drawn in"""
+        engine = self.engine
+        width = engine.board.width
+        top = self.view_top
+        cells = bytearray(engine.board.colors[top * width:(top + self.view_rows) * width])
+        piece = engine.current_piece
+        if piece and not engine.game_over:
+            for x, y in piece.get_cells():
+                row = y - top
+                if 0 <= row < self.view_rows:
+                    cells[row * width + x] = piece.color_index
+        return cells
+    
+    def draw_dirty(self):
+        """Redraw only the cells and HUD that changed and push just those rects"""
+        engine = self.engine
+        profiler = self.profiler
+        if self.background is None:
+            self.background = self.build_background()
+        
+        self.scroll_viewport()
+        width = engine.board.width
+        cell_size = self.cell_size
+        cells = self.compose_cells()
+        hud_state = (engine.score, engine.level, engine.lines_cleared, engine.upcoming(self.preview),
+                     profiler.overlay_lines if profiler else None)
+        overlay_state = (engine.paused, engine.game_over)
+        
+        # First frame, the viewport scrolling, or an overlay appearing or going
+        # away: repaint everything
+        if (self.drawn_cells is None or overlay_state != self.drawn_overlay_state
+                or self.view_top != self.drawn_view_top):
+            self.screen.blit(self.background, (0, 0))
+            for index, color_index in enumerate(cells):
+                if color_index:
+                    self.draw_cell(index % width, index // width, color_index)
+            self.flush_cells()
+            if profiler:
+                profiler.mark("grid")
+            self.draw_ui()
+            if profiler:
+                profiler.mark("ui")
+            pygame.display.flip()
+            if profiler:
+                profiler.mark("flip")
+            self.drawn_cells = cells
+            self.drawn_hud_state = hud_state
+            self.drawn_overlay_state = overlay_state
+            self.drawn_view_top = self.view_top
+            return
+        
+        # Nothing under the pause or game over overlay moves
+        if engine.paused or engine.game_over:
+            return
+        
+        dirty = []
+        
+        # Restore changed cells from the background, then fill them in
+        drawn = self.drawn_cells
+        if cells != drawn:
+            for index in range(len(cells)):
+                if cells[index] != drawn[index]:
+                    x = index % width
+                    y = index // width
+                    rect = pygame.Rect(
+                        GRID_X_OFFSET + x * cell_size,
+                        GRID_Y_OFFSET + y * cell_size,
+                        cell_size + 1,
+                        cell_size + 1
+                    )
+                    self.screen.blit(self.background, rect, rect)
+                    if cells[index]:
+                        self.draw_cell(x, y, cells[index])
+                    dirty.append(rect)
+            self.flush_cells()
+            self.drawn_cells = cells
+        if profiler:
+            profiler.mark("grid")
+        
+        # Score, level, lines, next piece or profiler text changed
+        if hud_state != self.drawn_hud_state:
+            self.screen.blit(self.background, self.hud_rect, self.hud_rect)
+            self.draw_hud()
+            dirty.append(self.hud_rect)
+            self.drawn_hud_state = hud_state
+        if profiler:
+            profiler.mark("ui")
+        
+        if dirty:
+            pygame.display.update(dirty)
+        if profiler:
+            profiler.mark("flip")
+    
+    def pump_events(self):
+        """Keep the window responsive while something other than run() drives it"""
+        pygame.event.pump()
+    
+    def track_undo(self):
+        """Remember the game state whenever a new piece has spawned (practice mode)"""
+        history = self.undo_history
+        if history is None:
+            return
+        if not history or history[-1].pieces_placed != self.engine.pieces_placed:
+            history.append(self.engine.snapshot())
+    
+    def undo(self):
+        """Go back to when the previous piece spawned (practice mode)"""
+        history = self.undo_history
+        if history is None or len(history) < 2:
+            return
+        history.pop()
+        self.engine.restore(history[-1])
+        self.accumulator = 0.0
+        self.controls.cancel()
+    
+    def toggle_profiler(self):
+        """Show or hide the frame profiler overlay, starting the profiler if needed"""
+        if self.profiler is None:
+            self.profiler = FrameProfiler(FPS)
+        self.profiler.toggle_overlay()
+        self.drawn_overlay_state = None  # Repaint the whole window next frame
+        self.repaint = True
+    
+    def is_idle(self):
+        """Check whether nothing can change on screen until the player does something"""
+        engine = self.engine
+        return (engine.paused or engine.game_over) and not self.controls.presses
+    
+    def idle_state(self):
+        """Get what the paused and game over screens show, to spot when they change"""
+        engine = self.engine
+        return engine.paused, engine.game_over, engine.seed, engine.pieces_placed, engine.score
+    
+    def frame_rate(self):
+        """Get the frame rate cap for the next frame"""
+        if not self.power_save:
+            return FPS
+        if self.minimized:
+            return MINIMIZED_FPS
+        if not self.focused:
+            return UNFOCUSED_FPS
+        return FPS
+    
+    def handle_window_event(self, event):
+        """Track focus and minimizing, and repaint after the window was covered"""
+        if event.type == pygame.WINDOWFOCUSLOST:
+            self.focused = False
+            self.controls.release_all()
+        elif event.type == pygame.WINDOWFOCUSGAINED:
+            self.focused = True
+        elif event.type == pygame.WINDOWMINIMIZED:
+            self.minimized = True
+        elif event.type == pygame.WINDOWRESTORED:
+            self.minimized = False
+        if event.type in REPAINT_EVENTS:
+            self.repaint = True
+            self.drawn_overlay_state = None
+    
+    def record_latency(self):
+        """Give the profiler the input-to-present latency of the presses the frame just presented shows"""
+        latencies = self.controls.presented(time.perf_counter())
+        if self.profiler:
+            for latency in latencies:
+                self.profiler.record_latency(latency)
+    
+    def save_profile(self):
+        """Write the frame profiler trace, if exporting one"""
+        if self.profile_path and self.profiler:
+            self.profiler.save(self.profile_path)
     
     def reset(self):
         """Reset the game"""
-        self.grid = [[BLACK for _ in range(GRID_WIDTH)] for _ in range(GRID_HEIGHT)]
-        self.score = 0
-        self.level = 1
-        self.lines_cleared = 0
-        self.game_over = False
-        self.paused = False
-        self.fall_timer = 0
-        self.fall_speed = FALL_SPEED
-        self.spawn_piece()
-        self.next_piece = self.create_random_piece()
+        self.save_recording()
+        self.archive_game()
+        self.engine.reset()
+        self.accumulator = 0.0
+        self.controls.cancel()
+        if self.recorder:
+            self.recorder = self.new_recorder()
+        if self.autoplayer:
+            self.autoplayer.reset(self.engine)
+        if self.undo_history is not None:
+            self.undo_history.clear()
+            self.track_undo()
     
     def run(self):
         """Main game loop"""
+        self.open_display()
         running = True
-        last_rotate_key = False
-        last_pause_key = False
+        drawn_state = None
         
         while running:
-            dt = self.clock.tick(FPS) / 1000.0  # Convert to seconds
+            profiler = self.profiler
+            fps = self.frame_rate()
+            if self.power_save and self.is_idle():
+                # Sleep until something happens instead of polling 60 times a
+                # second, then handle it without waiting for a frame
+                events = [pygame.event.wait()]
+                self.clock.tick()  # Time spent blocked is not game time
+                dt = TICK_DT
+                if profiler:
+                    profiler.skip_gap()
+            else:
+                # Sleep before reading input, so it is as fresh as possible
+                # when it is simulated and drawn
+                events = []
+                dt = self.clock.tick(fps) / 1000.0  # Convert to seconds
+            events += pygame.event.get()
+            now = time.perf_counter()  # Events are stamped when they are taken off the queue
+            if profiler:
+                profiler.begin_frame(fps)  # Throttled frames are not dropped frames
             
             # Handle events
-            for event in pygame.event.get():
+            controls = self.controls
+            for event in events:
+                self.handle_window_event(event)
                 if event.type == pygame.QUIT:
                     running = False
                 elif event.type == pygame.KEYDOWN:
-                    if event.key == pygame.K_r and self.game_over:
+                    if event.key == pygame.K_r and self.engine.game_over:
                         self.reset()
                     elif event.key == pygame.K_q:
                         running = False
-            
-            # Get current key states
-            keys = pygame.key.get_pressed()
-            
-            # Create input dict for handle_input
-            # For rotation and pause, only trigger on key press (not hold)
-            rotate_pressed = (keys[pygame.K_UP] or keys[pygame.K_SPACE]) and not last_rotate_key
-            pause_pressed = keys[pygame.K_p] and not last_pause_key
-            
-            input_keys = {
-                pygame.K_LEFT: keys[pygame.K_LEFT],
-                pygame.K_RIGHT: keys[pygame.K_RIGHT],
-                pygame.K_DOWN: keys[pygame.K_DOWN],
-                pygame.K_UP: rotate_pressed,
-                pygame.K_SPACE: rotate_pressed,
-                pygame.K_p: pause_pressed
-            }
-            
-            self.handle_input(input_keys)
-            
-            # Update last key states
-            last_rotate_key = keys[pygame.K_UP] or keys[pygame.K_SPACE]
-            last_pause_key = keys[pygame.K_p]
+                    elif event.key == pygame.K_F3:
+                        self.toggle_profiler()
+                    elif event.key == pygame.K_u:
+                        self.undo()
+                    else:
+                        controls.key_down(event.key, now)
+                elif event.type == pygame.KEYUP:
+                    controls.key_up(event.key, now)
+            if profiler:
+                profiler.mark("input")
             
             # Update game
-            self.update(dt)
+            if self.fixed_tick:
+                # Ticks run at their own times, trailing the frame by what is
+                # left in the accumulator; long stalls are capped so the game
+                # does not fast-forward after a hiccup
+                self.accumulator = min(self.accumulator + dt, MAX_FRAME_TIME)
+                tick_time = now - self.accumulator
+                while self.accumulator >= TICK_DT:
+                    self.accumulator -= TICK_DT
+                    tick_time += TICK_DT
+                    self.step(controls.actions(tick_time))
+            else:
+                self.handle_input(now)
+                self.engine.update(dt)
+            self.track_undo()
+            if profiler:
+                profiler.mark("update")
             
-            # Draw everything
-            self.draw()
-        
+            # Draw everything (power-save mode skips frames that would look
+            # the same as the last one, and everything while minimized)
+            if self.power_save and (self.minimized or (
+                    self.is_idle() and not self.repaint and self.idle_state() == drawn_state)):
+                pass
+            else:
+                if self.dirty_rects:
+                    self.draw_dirty()
+                else:
+                    self.draw()
+                self.record_latency()
+            drawn_state = self.idle_state()
+            self.repaint = False
+            if profiler:
+                profiler.end_frame()
+        
+        self.save_recording()
+        self.archive_game()
+        if self.archive is not None:
+            self.archive.close()
+        self.save_profile()
         pygame.quit()
         sys.exit()
 
 
 def main():
     """Entry point"""
-    game = TetrisGame()
+    parser = argparse.ArgumentParser(description="Tetris")
+    parser.add_argument("--dirty-rects", action="store_true",
+                        help="only repaint and push the screen areas that changed")
+    parser.add_argument("--fixed-tick", action="store_true",
+                        help="advance the game in fixed ticks (deterministic for a given seed)")
+    parser.add_argument("--seed", type=int, help="seed for the first game's piece sequence")
+    parser.add_argument("--record", metavar="DIR",
+                        help="record every game's per-tick input to DIR (implies --fixed-tick)")
+    parser.add_argument("--autoplay", action="store_true",
+                        help="let the built-in placement-search bot play")
+    parser.add_argument("--randomizer", choices=sorted(GENERATORS), default="uniform",
+                        help="piece generator: independent uniform picks or shuffled 7-piece bags")
+    parser.add_argument("--width", type=int, default=GRID_WIDTH, help=f"board width in cells (default {GRID_WIDTH})")
+    parser.add_argument("--height", type=int, default=GRID_HEIGHT,
+                        help=f"board height in cells (default {GRID_HEIGHT}); tall boards scroll")
+    parser.add_argument("--preview", type=int, default=1, choices=range(1, DEFAULT_LOOKAHEAD + 2),
+                        metavar=f"1-{DEFAULT_LOOKAHEAD + 1}", help="upcoming pieces to show (default 1)")
+    parser.add_argument("--power-save", action="store_true",
+                        help="sleep while paused or game over and slow down in the background")
+    parser.add_argument("--practice", action="store_true",
+                        help="practice mode: press U to take back the last piece")
+    parser.add_argument("--measure-startup", action="store_true",
+                        help="draw one frame, print how long startup took and exit")
+    parser.add_argument("--full-init", action="store_true",
+                        help="start every Pygame subsystem with pygame.init() (for comparison)")
+    parser.add_argument("--profile", metavar="FILE",
+                        help="time every frame's phases and write the trace to FILE (.csv or .json) at exit")
+    parser.add_argument("--das", type=float, default=DEFAULT_DAS * 1000, metavar="MS",
+                        help=f"delayed auto shift: how long left/right are held before they repeat "
+                             f"(default {DEFAULT_DAS * 1000:g})")
+    parser.add_argument("--arr", type=float, default=DEFAULT_ARR * 1000, metavar="MS",
+                        help=f"auto repeat rate: time between repeated moves, 0 for every tick "
+                             f"(default {DEFAULT_ARR * 1000:g})")
+    parser.add_argument("--archive", metavar="FILE",
+                        help="append every game's placements and line clears to the game archive FILE "
+                             "(implies --fixed-tick)")
+    args = parser.parse_args()
+    
+    if args.practice and args.record:
+        parser.error("--practice cannot be combined with --record (undo would break the replay)")
+    if args.das < 0 or args.arr < 0:
+        parser.error("--das and --arr cannot be negative")
+    if args.record:
+        os.makedirs(args.record, exist_ok=True)
+    if args.full_init:
+        pygame.init()
+    
+    try:
+        game = TetrisGame(dirty_rects=args.dirty_rects, fixed_tick=args.fixed_tick,
+                          seed=args.seed, record_dir=args.record, autoplay=args.autoplay,
+                          profile_path=args.profile, practice=args.practice, power_save=args.power_save,
+                          randomizer=args.randomizer, preview=args.preview, width=args.width, height=args.height,
+                          archive_path=args.archive, das=args.das / 1000, arr=args.arr / 1000)
+    except (OSError, ValueError) as error:
+        parser.error(str(error))
+    if args.measure_startup:
+        measure_startup(game)
+        return
     game.run()
 
 
+def measure_startup(game):
+    """Open the window, draw the first frame and print where the startup time went"""
+    created = time.perf_counter()
+    game.open_display()
+    opened = time.perf_counter()
+    game.draw()
+    drawn = time.perf_counter()
+    print(f"startup: {(drawn - IMPORT_START) * 1000:.1f} ms to first frame "
+          f"(imports and setup {(created - IMPORT_START) * 1000:.1f} ms, "
+          f"init and window {(opened - created) * 1000:.1f} ms, "
+          f"first frame with fonts {(drawn - opened) * 1000:.1f} ms)", file=sys.stderr)
+    pygame.quit()
+
+
 if __name__ == "__main__":
     main()
 
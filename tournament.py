@@ -0,0 +1,198 @@
+"""
+Bot Tournament Runner
+Plays many headless games of a pluggable agent in parallel worker processes,
+streams per-game results as JSON lines and prints summary statistics.
+
+Usage:
+    python tournament.py --agent random --seeds 0:10000
+    python tournament.py --agent mybots:GreedyAgent --seeds 0:100000 --output results.jsonl
+    python tournament.py --agent placement --seeds 0:10000 --archive games.tga
+"""
+
+import argparse
+import importlib
+import json
+import os
+import random
+import statistics
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from archive import GameArchive, GameLog, pack_game
+from constants import ACTION_LEFT, ACTION_RIGHT, ACTION_DOWN, ACTION_ROTATE, ACTION_PAUSE
+from engine import TetrisEngine
+from randomizer import GENERATORS
+
+DEFAULT_MAX_TICKS = 216000  # One hour of play at 60 ticks per second
+
+
+class Agent:
+    """Base class for bots: choose an ACTION_* mask for every tick"""
+    
+    def reset(self, engine):
+        """Called when a new game starts"""
+    
+    def act(self, engine):
+        """Return the action mask to apply on this tick"""
+        return 0
+
+
+class RandomAgent(Agent):
+    """Presses random keys (a floor for comparing real agents)"""
+    
+    ACTIONS = (0, ACTION_LEFT, ACTION_RIGHT, ACTION_DOWN, ACTION_ROTATE)
+    
+    def reset(self, engine):
+        self.rng = random.Random(engine.seed)
+    
+    def act(self, engine):
+        return self.rng.choice(self.ACTIONS)
+
+
+# Agents that can be named on the command line without a module path
+BUILTIN_AGENTS = {
+    "idle": Agent,
+    "random": RandomAgent,
+    "placement": "ai:PlacementAgent"
+}
+
+
+def load_agent(spec):
+    """Create an agent from a built-in name or a 'module:ClassName' path"""
+    spec = BUILTIN_AGENTS.get(spec, spec)
+    if not isinstance(spec, str):
+        return spec()
+    module_name, _, class_name = spec.partition(":")
+    if not class_name:
+        raise ValueError(f"unknown agent {spec!r} (use one of {sorted(BUILTIN_AGENTS)} or module:ClassName)")
+    return getattr(importlib.import_module(module_name), class_name)()
+
+
+def play_game(agent, seed, max_ticks=DEFAULT_MAX_TICKS, randomizer="uniform", archive=False):
+    """Play one game to the end (or max_ticks) and return its result
+    
+    With archive, the result's 'packed' key holds the game packed for a GameArchive.
+    """
+    start = time.perf_counter()
+    engine = TetrisEngine(seed, randomizer)
+    if archive:
+        engine.log = GameLog()
+    agent.reset(engine)
+    while not engine.game_over and engine.ticks < max_ticks:
+        # Bots never get to pause the clock
+        engine.step(agent.act(engine) & ~ACTION_PAUSE)
+    result = {
+        "seed": seed,
+        "score": engine.score,
+        "level": engine.level,
+        "lines": engine.lines_cleared,
+        "pieces": engine.pieces_placed,
+        "ticks": engine.ticks,
+        "game_over": engine.game_over,
+        "wall_time": time.perf_counter() - start
+    }
+    if archive:
+        result["packed"] = pack_game(engine, engine.log)
+    return result
+
+
+def play_games(agent_spec, seeds, max_ticks, randomizer="uniform", archive=False):
+    """Worker entry point: play a chunk of seeds with one agent instance"""
+    agent = load_agent(agent_spec)
+    return [play_game(agent, seed, max_ticks, randomizer, archive) for seed in seeds]
+
+
+def summarize(results):
+    """Aggregate per-game results into summary statistics"""
+    summary = {"games": len(results)}
+    for key in ("score", "level", "lines", "pieces", "ticks", "wall_time"):
+        values = sorted(result[key] for result in results)
+        summary[key] = {
+            "mean": statistics.fmean(values),
+            "stdev": statistics.pstdev(values),
+            "min": values[0],
+            "p10": values[len(values) // 10],
+            "median": statistics.median(values),
+            "p90": values[len(values) * 9 // 10],
+            "max": values[-1]
+        }
+    return summary
+
+
+def parse_seeds(text):
+    """Parse 'START:END' or a comma-separated list of seeds"""
+    if ":" in text:
+        start, _, end = text.partition(":")
+        return list(range(int(start or 0), int(end)))
+    return [int(seed) for seed in text.split(",")]
+
+
+def main():
+    """Run a tournament and print the summary"""
+    parser = argparse.ArgumentParser(description="Run headless Tetris games for a bot agent in parallel")
+    parser.add_argument("--agent", default="random",
+                        help=f"agent to play: {', '.join(sorted(BUILTIN_AGENTS))} or module:ClassName")
+    parser.add_argument("--seeds", type=parse_seeds, default=parse_seeds("0:100"),
+                        help="seeds to play, as START:END or a comma-separated list (default 0:100)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(),
+                        help="worker processes (default: one per CPU core)")
+    parser.add_argument("--chunk-size", type=int, default=16,
+                        help="games sent to a worker at a time")
+    parser.add_argument("--max-ticks", type=int, default=DEFAULT_MAX_TICKS,
+                        help="stop a game after this many ticks")
+    parser.add_argument("--randomizer", choices=sorted(GENERATORS), default="uniform",
+                        help="piece generator: independent uniform picks or shuffled 7-piece bags")
+    parser.add_argument("--output", metavar="FILE",
+                        help="write one JSON line per game to FILE (default: stdout)")
+    parser.add_argument("--archive", metavar="FILE",
+                        help="append every game's placements and line clears to the game archive FILE")
+    args = parser.parse_args()
+    
+    if not args.seeds:
+        parser.error("--seeds selects no games")
+    if (args.workers is not None and args.workers < 1) or args.chunk_size < 1:
+        parser.error("--workers and --chunk-size must be at least 1")
+    
+    # Fail fast on a bad agent spec instead of in every worker
+    try:
+        load_agent(args.agent)
+    except (ValueError, ImportError, AttributeError) as error:
+        parser.error(f"cannot load agent {args.agent!r}: {error}")
+    
+    try:
+        archive = GameArchive(args.archive) if args.archive else None
+    except (OSError, ValueError) as error:
+        parser.error(str(error))
+    out = open(args.output, "w") if args.output else sys.stdout
+    results = []
+    start = time.perf_counter()
+    chunks = [args.seeds[i:i + args.chunk_size] for i in range(0, len(args.seeds), args.chunk_size)]
+    with ProcessPoolExecutor(max_workers=args.workers) as executor:
+        futures = [executor.submit(play_games, args.agent, chunk, args.max_ticks, args.randomizer, archive is not None)
+                   for chunk in chunks]
+        for future in as_completed(futures):
+            for result in future.result():
+                if archive is not None:
+                    archive.append(result.pop("packed"))
+                out.write(json.dumps(result) + "\n")
+                results.append(result)
+            out.flush()
+            print(f"\r{len(results)}/{len(args.seeds)} games", end="", file=sys.stderr)
+    print(file=sys.stderr)
+    if out is not sys.stdout:
+        out.close()
+    if archive is not None:
+        archive.close()
+    
+    if not results:
+        return
+    elapsed = time.perf_counter() - start
+    summary = summarize(results)
+    summary["elapsed"] = elapsed
+    summary["games_per_second"] = len(results) / elapsed
+    print(json.dumps(summary, indent=2), file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
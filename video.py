@@ -0,0 +1,216 @@
+"""
+Offscreen Video Recording
+Re-simulates recorded games and renders them with TetrisGame.draw into
+offscreen surfaces (no window, no frame pacing), handing each finished frame
+to a background thread that writes a PPM image sequence or one raw RGB24
+video file. Frames are written straight from the surfaces' pixel memory.
+
+Usage:
+    python video.py games/*.json --output clips
+    python video.py game.json --ticks 1200:1800 --format ppm --every 2
+"""
+
+import argparse
+import os
+import queue
+import sys
+import threading
+import time
+
+from constants import TICK_RATE
+from replay import Recording, parse_tick_range
+
+FORMATS = ("raw", "ppm")
+
+# Frames rendered but not yet written; the renderer waits while this many are queued
+DEFAULT_QUEUE_SIZE = 8
+
+# Channel masks of a 24-bit surface whose pixel memory is R, G, B bytes in order
+RGB24_MASKS = (0xFF, 0xFF00, 0xFF0000, 0) if sys.byteorder == "little" else (0xFF0000, 0xFF00, 0xFF, 0)
+
+
+class FrameWriter:
+    """Writes RGB24 surfaces from a bounded queue on a background thread
+    
+    Surfaces are queued by reference, not copied: a surface must not be drawn
+    into again until it has been written (VideoRenderer cycles through
+    queue_size + 2 of them, which guarantees that).
+    """
+    
+    def __init__(self, path, size, fmt="raw", queue_size=DEFAULT_QUEUE_SIZE):
+        if fmt not in FORMATS:
+            raise ValueError(f"unknown video format {fmt!r}")
+        self.path = path
+        self.size = size
+        self.format = fmt
+        self.frames = 0
+        self.error = None
+        if fmt == "ppm":
+            os.makedirs(path, exist_ok=True)
+            self.file = None
+        else:
+            self.file = open(path, "wb")
+        self.queue = queue.Queue(queue_size)
+        self.thread = threading.Thread(target=self.run, name=f"video writer {path}", daemon=True)
+        self.thread.start()
+    
+    def write(self, surface):
+        """Queue a frame, waiting while the queue is full"""
+        if self.error:
+            raise self.error
+        self.queue.put(surface)
+    
+    def run(self):
+        """Writer thread: write queued frames until close() sends None"""
+        while True:
+            surface = self.queue.get()
+            if surface is None:
+                return
+            # After an error keep draining, so the renderer never blocks on a full queue
+            if self.error:
+                continue
+            try:
+                self.write_frame(surface)
+            except Exception as error:  # Raised again in the rendering thread
+                self.error = error
+    
+    def write_frame(self, surface):
+        """Write one surface's pixels"""
+        width, height = self.size
+        row = width * 3
+        pitch = surface.get_pitch()
+        pixels = memoryview(surface.get_buffer())
+        try:
+            # Rows are padded when width * 3 is not a multiple of 4
+            data = pixels if pitch == row else b"".join(pixels[y * pitch:y * pitch + row] for y in range(height))
+            if self.file is None:
+                name = os.path.join(self.path, f"frame_{self.frames:06d}.ppm")
+                with open(name, "wb") as f:
+                    f.write(b"P6\n%d %d\n255\n" % (width, height))
+                    f.write(data)
+            else:
+                self.file.write(data)
+        finally:
+            # Unlocks the surface for drawing
+            pixels.release()
+        self.frames += 1
+    
+    def close(self):
+        """Wait for every queued frame to be written, then close the output"""
+        self.queue.put(None)
+        self.thread.join()
+        if self.file is not None:
+            self.file.close()
+        if self.error:
+            raise self.error
+
+
+class VideoRenderer:
+    """A TetrisGame drawing offscreen into a ring of surfaces handed to a FrameWriter"""
+    
+    def __init__(self, queue_size=DEFAULT_QUEUE_SIZE):
+        self.queue_size = queue_size
+        self.game = None
+        self.size = None
+        self.surfaces = []
+        self.next_surface = 0
+    
+    def prepare(self, engine):
+        """Point the renderer at engine, laying it out again if its board size differs"""
+        game = self.game
+        if game is not None and (game.engine.board.width, game.engine.board.height) == (
+                engine.board.width, engine.board.height):
+            game.engine = engine
+            game.view_top = 0
+            return
+        
+        # Imported here so the module loads without Pygame until frames are drawn
+        import pygame
+        from tetris import TetrisGame
+        
+        self.game = game = TetrisGame(engine=engine)
+        self.size = (game.window_width, game.window_height)
+        # One surface being drawn, queue_size queued and one being written
+        self.surfaces = [pygame.Surface(self.size, 0, 24, RGB24_MASKS) for _ in range(self.queue_size + 2)]
+        self.next_surface = 0
+        game.open_offscreen(self.surfaces[0])
+    
+    def render(self, writer):
+        """Draw the game's current state as the writer's next frame"""
+        surface = self.surfaces[self.next_surface]
+        self.next_surface = (self.next_surface + 1) % len(self.surfaces)
+        game = self.game
+        game.screen = surface
+        game.draw()
+        writer.write(surface)
+    
+    def record(self, recording, path, fmt="raw", ticks=None, every=1):
+        """Re-simulate a recording, writing every every-th tick in ticks (default all)
+        
+        Simulation stops after the last tick in ticks. Returns the engine and
+        the number of frames written.
+        """
+        engine = recording.new_engine()
+        self.prepare(engine)
+        writer = FrameWriter(path, self.size, fmt, self.queue_size)
+        try:
+            for tick, actions in enumerate(recording.actions()):
+                if ticks is not None and tick >= ticks.stop:
+                    break
+                engine.step(actions)
+                if (ticks is None or tick in ticks) and (tick - (ticks.start if ticks else 0)) % every == 0:
+                    self.render(writer)
+        finally:
+            writer.close()
+        return engine, writer.frames
+
+
+def output_path(directory, recording_path, fmt):
+    """Where the video of a recording goes: DIR/<name>.rgb, or DIR/<name>/ for PPM frames"""
+    name = os.path.splitext(os.path.basename(recording_path))[0]
+    return os.path.join(directory, name if fmt == "ppm" else name + ".rgb")
+
+
+def main():
+    """Render recordings to video files as fast as they can be drawn and written"""
+    parser = argparse.ArgumentParser(description="Render recorded Tetris games to video offscreen")
+    parser.add_argument("recordings", nargs="+", help="recording files written with --record")
+    parser.add_argument("--output", metavar="DIR", default="videos", help="directory for the videos")
+    parser.add_argument("--format", choices=FORMATS, default="raw",
+                        help="one raw RGB24 file per game, or a directory of PPM frames")
+    parser.add_argument("--ticks", metavar="START:END", type=parse_tick_range,
+                        help="only render this range of ticks")
+    parser.add_argument("--every", type=int, default=1, metavar="N",
+                        help="render every Nth tick (2 gives 30 frames per second)")
+    parser.add_argument("--queue", type=int, default=DEFAULT_QUEUE_SIZE,
+                        help="frames that may wait for the writer thread")
+    args = parser.parse_args()
+    
+    if args.every < 1 or args.queue < 1:
+        parser.error("--every and --queue must be at least 1")
+    os.makedirs(args.output, exist_ok=True)
+    
+    renderer = VideoRenderer(args.queue)
+    frame_rate = TICK_RATE / args.every
+    total_frames = 0
+    start = time.perf_counter()
+    for path in args.recordings:
+        try:
+            recording = Recording.load(path)
+            output = output_path(args.output, path, args.format)
+            engine, frames = renderer.record(recording, output, args.format, args.ticks, args.every)
+        except (OSError, ValueError) as error:
+            sys.exit(f"video: {error}")
+        total_frames += frames
+        width, height = renderer.size
+        print(f"{path}: {frames} frames of {width}x{height} to {output} (tick {engine.ticks}, score {engine.score})")
+    
+    elapsed = time.perf_counter() - start
+    print(f"{total_frames} frames in {elapsed:.2f}s ({total_frames / max(elapsed, 1e-9):.0f} frames/s)")
+    if args.format == "raw":
+        print(f"encode with: ffmpeg -f rawvideo -pixel_format rgb24 -video_size {width}x{height} "
+              f"-framerate {frame_rate:g} -i FILE.rgb FILE.mp4")
+
+
+if __name__ == "__main__":
+    main()